@@ -41,6 +41,8 @@ class IconManager:
         if hasattr(self.item, "syncd"):
             if self.item.syncd:
                 return self.get_icon("success")
+        if getattr(self.item, "cancelled", False):
+            return self.get_icon("warning")
         return self.get_icon("load")
 
     def asset_status(self):
@@ -26,6 +26,8 @@ class SyncResolver(BaseResolver):
             if hasattr(self.row, "syncd"):
                 if self.row.syncd:
                     return "Synced"
+            if getattr(self.row, "cancelled", False):
+                return "Cancelled"
         return dict_value
 
     def asset_name(self, dict_value):
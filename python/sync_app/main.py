@@ -6,6 +6,7 @@ import random
 import time
 import sys
 import pprint
+import threading
 
 
 import sgtk
@@ -17,16 +18,34 @@ from .utils import PrefFile, open_browser
 from .utils.inspection import partialclass, trace, method_decorator
 from .ui.dialog import Ui_Dialog
 from .utils.progress import ProgressHandler
-from .workers.sync_worker import SyncWorker, AssetInfoGatherWorker
+from .utils.connection_pool import ConnectionPool
+from .utils.throttle import TokenBucket
+from .utils.sync_journal import SyncJournal
+from .utils.gather_stats import GatherStats
+from .utils.result_buffer import ResultBuffer
+from .workers.sync_worker import (
+    SyncWorker,
+    BatchSyncWorker,
+    ParallelSyncWorker,
+    AssetInfoGatherWorker,
+)
+from .workers.sync_scheduler import SyncScheduler
+from .workers.publish_prefetch import PublishPrefetchWorker
+from .workers.gather_plan import GatherPlanWorker
+from .process.resolver_cache import RESOLVER_CACHE
 from .workers.timed_events import TimeLord
 
 log = sgtk.platform.get_logger(__name__)
 
+# milliseconds between two drains of the worker result buffer
+RESULT_DRAIN_INTERVAL = 100
+
 # @method_decorator(trace)
 class SyncApp:
 
     _fw = None
     _p4 = None
+    _connection_pool = None
     _ui = None
 
     progress = 0
@@ -62,6 +81,11 @@ class SyncApp:
         self.timer_worker.update_ui.connect(self.timed_event_handler)
         self.threadpool.start(self.timer_worker)
         self.threadpool.setMaxThreadCount(min(23, self.threadpool.maxThreadCount()))
+
+        # syncs run on their own bounded threadpool so they never starve gathering
+        self.sync_scheduler = SyncScheduler(
+            max_threads=self.parent_sgtk_app.get_setting("sync_max_threads", 4)
+        )
         self.model_view_updating = False
 
         # file base for accessing Qt resources outside of resource scope
@@ -72,12 +96,59 @@ class SyncApp:
         self.input_data = self.entities_to_sync
         # TODO why create another variable here rather than just using the one we have?
 
+        # worker results are buffered and drained on the UI thread in batches
+        self.results = ResultBuffer()
+        self.results.register("progress", self.report_progresses)
+        self.results.register("item_found", self.report_worker_infos)
+        self.results.register("info_gathered", self.data_gathering_completes)
+        self.results.register("includes", self.update_filters)
+        self.results.register("plans", self.start_gather_workers)
+        self.results.register("shards", self.start_shard_workers)
+        self.results.register("p4_log", self.handle_raw_perforce_logs)
+        self.results.register("sync_started", self.items_starting_sync)
+        self.results.register("sync_completed", self.items_completed_sync)
+        self.results.register("publishes", self.update_publish_index)
+        self.results.register("publishes_done", self.publish_index_ready)
+
+        self.results_timer = QtCore.QTimer()
+        self.results_timer.setInterval(RESULT_DRAIN_INTERVAL)
+        self.results_timer.timeout.connect(self.results.drain)
+        self.results_timer.start()
+
+        # set to stop the gather or sync run in flight, replaced on every run
+        self.cancel_event = threading.Event()
+        self.results.run = self.cancel_event
+
+        # on-disk record of the sync session so it can be resumed
+        self.journal = SyncJournal(
+            max_age_hours=self.parent_sgtk_app.get_setting(
+                "sync_journal_max_age_hours", 24.0
+            )
+        )
+
+        # gather cost of every entity in previous sessions, biggest go first
+        self.gather_stats = GatherStats()
+        self.gather_session = {}
+
+        # extensions left out while gathering, see saved_excluded_extensions
+        self.excluded_extensions = set()
+
         self.row_data = {}
         self.row = 0
         self._total = 0
+        self._planning = False
         self.current_entity_index = 0
         self.current_count = 0
 
+    def buffer_results(self, signal, kind):
+        """
+        Connect a worker signal so its payloads land in the result buffer
+        directly from the emitting thread, tagged with the current run.
+        """
+        signal.connect(
+            self.results.pusher(kind, run=self.cancel_event), QtCore.Qt.DirectConnection
+        )
+
     @property
     def logger(self):
         # TODO ensure that the logger actually logs with proper naming
@@ -122,6 +193,66 @@ class SyncApp:
             self._p4 = self.fw.connection.connect()
         return self._p4
 
+    @property
+    def connection_pool(self):
+        """
+        Pool of perforce connections shared by the gather and sync workers
+        """
+        if not self._connection_pool:
+            self._connection_pool = ConnectionPool(
+                self.fw,
+                size=self.parent_sgtk_app.get_setting("p4_connection_pool_size", 8),
+            )
+        return self._connection_pool
+
+    def cancel(self):
+        """
+        Cancel the gather or sync run in flight. Sync workers still queued are
+        drained, running ones stop at their next batch boundary and gather
+        workers skip whatever work is left. Rows that were not synced are
+        marked as cancelled so the model stays consistent.
+        """
+        self.cancel_event.set()
+        self.sync_scheduler.threadpool.clear()
+
+        cancelled = 0
+        for item in getattr(self, "item_map", {}).values():
+            if not getattr(item, "syncd", False) and not getattr(item, "error", None):
+                item.syncing = False
+                item.cancelled = True
+                cancelled += 1
+
+        if cancelled:
+            self.ui.add_log("Cancelled sync of {} files.".format(cancelled))
+        else:
+            self.ui.add_log("Cancelled.")
+
+        self.ui.update_progress_bar(1)
+        self.ui.show_tree()
+        self.ui.model.refresh()
+        self.ui.interactive = True
+
+    def start_run(self):
+        """
+        Stop the workers of the previous gather or sync run, which hold on to
+        its cancel event, and start a new run. Results the previous run still
+        has buffered or in flight are dropped rather than counted in this one.
+        """
+        self.cancel_event.set()
+        self.cancel_event = threading.Event()
+        self.results.run = self.cancel_event
+
+    def shutdown(self):
+        """
+        Release resources held by the app when the dialog closes.
+        """
+        self.cancel_event.set()
+        self.sync_scheduler.threadpool.clear()
+        self.results_timer.stop()
+        self.journal.flush(force=True)
+        if self._connection_pool:
+            self._connection_pool.close()
+
     @property
     def fw(self):
         """
@@ -139,7 +270,7 @@ class SyncApp:
         """
         # self.ui.list_of_filter_types = ["step", "type", "ext"]
 
-        self.initialize_data()
+        self.initialize_data(resume=True)
 
         msg = "\n\n"
         self.ui.add_log(msg)
@@ -176,32 +307,64 @@ class SyncApp:
     def report_worker_info(self, item):
         """
         Method to process incoming dictionaries regarding items found
-        to sync.  This is connected to the worker thread's singal
-        emitter so it is triggered automatically.
+        to sync.
 
         Args:
             item (dict): dictionary with P4/SG single file sync information
                         ...
                         asset_name: str
                         item_found
-        Raises:
-            sgtk.TankError: _description_
         """
+        self.report_worker_infos([item])
+
+    def report_worker_infos(self, items):
+        """
+        Process a batch of items found to sync, as drained from the result
+        buffer, with a single model insertion and log update.
 
-        self.ui.model.add_row(item)
+        Args:
+            items (list): dictionaries with P4/SG single file sync information
+        """
 
-        index = item.get("index", 0)
-        index += 1
-        if "item_found" in item:
-            key = item["item_found"].get("clientFile", None)
-            val = item["item_found"].get("depotFile", None)
-            # self.logger.info("key : {}".format(key))
-            # self.logger.info("val : {}".format(val))
-            self.row_data[key] = val
+        self.ui.model.add_rows(items)
+
+        messages = []
+        for item in items:
+            index = item.get("index", 0)
+            index += 1
+            if "item_found" in item:
+                key = item["item_found"].get("clientFile", None)
+                val = item["item_found"].get("depotFile", None)
+                self.row_data[key] = val
+
+                if self.entity_total:
+                    messages.append(
+                        "({}/{}) Adding file: {}".format(index, self.entity_total, key)
+                    )
+                else:
+                    # still streaming, the total is not known yet
+                    messages.append("({}) Adding file: {}".format(index, key))
+
+        if messages:
             self.ui.get_row_data(self.parent_sgtk_app, self.row_data)
+            self.ui.add_log("\n".join(messages))
 
-            msg = "({}/{}) Adding file: {}".format(index, self.entity_total, key)
-            self.ui.add_log(msg)
+    def report_progresses(self, items):
+        """
+        Only the first and latest progress report of a batch are worth
+        showing, everything in between is superseded.
+        """
+        for i, item in enumerate(items):
+            if item.get("id") == -1 or i == len(items) - 1:
+                self.report_progress(item)
+
+    def update_filters(self, filter_infos):
+        for filter_info in dict.fromkeys(filter_infos):
+            self.ui.update_available_filters(filter_info)
+
+    def data_gathering_completes(self, completion_dicts):
+        for completion_dict in completion_dicts:
+            self.data_gathering_complete(completion_dict)
 
     def item_completed(self, data):
 
@@ -229,25 +392,167 @@ class SyncApp:
         """
         self.ui.show_tree()
         self._cur_progress += 1
+        self.record_gather_cost(completion_dict)
         self.logger.info("Progress: {}/{}".format(self._cur_progress, self._total))
         #self.progress_handler.iterate("assets_info")
         self.ui.update_progress()
         self.logger.info("Finished gathering data from perforce.")
 
-        if self._cur_progress == self._total:
+        self.check_gathering_complete()
+
+    def check_gathering_complete(self):
+        """
+        Wrap up the gather once every planned worker reported completion
+        """
+        if not self._planning and self._cur_progress == self._total:
             self.ui.model.refresh()
             self.ui.interactive = True
+            self.gather_stats.record(self.gather_session)
+            self.gather_session = {}
+            self.start_publish_prefetch()
+
+    def update_publish_index(self, index_chunks):
+        self.ui.update_publish_index(index_chunks)
+
+    def publish_index_ready(self, completions):
+        """
+        Let the details panel rely on the publish index alone, only when the
+        prefetch covered every path. After a failed or cancelled prefetch the
+        missing paths keep being looked up on demand.
+        """
+        if not all(completions):
+            self.logger.warning("Publish prefetch incomplete, {} files prefetched".format(
+                len(self.ui._publish_index)
+            ))
+            return
+        self.ui.publish_index_ready()
+        self.logger.info("Publish data prefetched for {} files".format(
+            len(self.ui._publish_index)
+        ))
+
+    def start_publish_prefetch(self):
+        """
+        Look up the publishes of every gathered depot path in the background,
+        so the details panel does not query ShotGrid on every click.
+        """
+        depot_paths = [path for path in self.row_data.values() if path]
+        if not depot_paths:
+            self.ui.publish_index_ready()
+            return
+
+        prefetch_worker = PublishPrefetchWorker(
+            app=self.parent_sgtk_app,
+            depot_paths=depot_paths,
+            chunk_size=self.parent_sgtk_app.get_setting("publish_prefetch_chunk_size", 200),
+        )
+        prefetch_worker.cancelled = self.cancel_event
+        self.buffer_results(prefetch_worker.prefetched, "publishes")
+        self.buffer_results(prefetch_worker.finished, "publishes_done")
+        self.threadpool.start(prefetch_worker)
+
+    def record_gather_cost(self, completion_dict):
+        """
+        Add up the time and files of every worker of an entity, shards
+        included, for the next session to order gathers by.
+        """
+        entity = completion_dict.get("entity")
+        if not entity or completion_dict.get("status") != "gathered":
+            return
+        stats = self.gather_session.setdefault(
+            GatherStats.key(entity), {"duration": 0, "files": 0}
+        )
+        stats["duration"] += completion_dict.get("duration", 0)
+        stats["files"] += completion_dict.get("files", 0)
+
+    def resume_session(self, rows):
+        """
+        Populate the model with the rows an interrupted sync session of the
+        same entities did not complete, instead of gathering again.
+
+        Args:
+            rows (list): row data dictionaries read back from the sync journal
+        """
+        for row_data in rows:
+            self.ui.model.add_row(row_data)
+            if row_data.get("ext"):
+                self.ui.update_available_filters(("ext", row_data["ext"]))
+            item_found = row_data.get("item_found", {})
+            self.row_data[item_found.get("clientFile")] = item_found.get("depotFile")
+
+        self.ui.get_row_data(self.parent_sgtk_app, self.row_data)
+        self.ui.add_log(
+            "Resuming {} files left by an interrupted sync session. "
+            "Use Rescan to gather from Perforce again.".format(len(rows))
+        )
+        self.ui.show_tree()
+        self.ui.model.refresh()
+        self.start_publish_prefetch()
 
-    def initialize_data(self):
+    def initialize_data(self, resume=False):
         """
         Iterate through tk-multi-perforce delivered list of asset information,
         Utilize a global threadpool to process workers to ask P4 server for what
         there is to sync for these.
+
+        Args:
+            resume (bool): resume an interrupted sync session of the same
+                           entities from the sync journal if there is one
         """
+        if resume:
+            rows = self.journal.remaining_rows(self.entities_to_sync)
+            if rows:
+                self.resume_session(rows)
+                return
+        else:
+            self.journal.clear()
+
+        self.start_run()
         self.ui.interactive = False
+        self.ui.reset_publish_index()
+
+        if self.ui._force_sync.isChecked():
+            # a forced rescan resolves contexts and root paths from scratch
+            RESOLVER_CACHE.invalidate()
 
-        self._total = len(self.entities_to_sync)
         self._cur_progress = 0
+        self._total = 0
+        self._planning = True  # until the plan worker handed every plan back
+        self.gather_session = {}
+
+        self.excluded_extensions = self.saved_excluded_extensions()
+
+        # folders and root plans are prepared off the UI thread, the gather
+        # workers are queued once they are in, see start_gather_workers
+        plan_worker = GatherPlanWorker(
+            app=self.parent_sgtk_app, entities=self.entities_to_sync
+        )
+        plan_worker.cancelled = self.cancel_event
+        self.buffer_results(plan_worker.planned, "plans")
+        self.threadpool.start(plan_worker)
+
+    def start_gather_workers(self, planned):
+        """
+        Queue a gather worker per root planned by the GatherPlanWorker, unless
+        the run they were planned for was cancelled or superseded. Roots that
+        resolve come first, those that needed folders created follow.
+
+        Args:
+            planned (list): payloads of the gather plan worker
+        """
+        for payload in planned:
+            if payload["cancelled"].is_set():
+                continue
+            self.queue_gather_workers(payload["plans"])
+            if payload["final"]:
+                self._planning = False
+                # every worker queued so far may already be done
+                self.check_gathering_complete()
+
+    def queue_gather_workers(self, plans):
+        """
+        Start the gather workers of the planned roots, most expensive first.
+        """
+        self._total += len(plans)
 
         #if not self.ui.progress_handler:
         #    self.ui.progress_handler = self.progress_handler
@@ -256,69 +561,292 @@ class SyncApp:
         #    **{"items": len(self.entities_to_sync), "id": "assets_info"}
         #)
 
-        for index, current_entity in enumerate(self.entities_to_sync):
+        # longest gathers first, so the largest root does not start last
+        plans = self.gather_stats.by_cost(plans, entity=lambda plan: plan["entity"])
+        for index, plan in enumerate(plans):
             self.current_entity_index = index
-            asset_info_gather_worker = AssetInfoGatherWorker(
-                app=self.parent_sgtk_app, entity=current_entity, framework=self.fw
+            self.start_gather_worker(
+                plan["entity"], nested=plan["nested"], priority=len(plans) - index
             )
 
-            asset_info_gather_worker.force = self.ui._force_sync.isChecked()
-            asset_info_gather_worker.p4 = self.p4
-            asset_info_gather_worker.total_items_found.connect(self.report_progress)
-            # as workers emit the item_found_to_sync, hit that method with the payload from it
-            asset_info_gather_worker.item_found_to_sync.connect(self.report_worker_info)
-            asset_info_gather_worker.info_gathered.connect(self.data_gathering_complete)
-            asset_info_gather_worker.includes.connect(self.ui.update_available_filters)
-
-            # TODO signal for the raw perforce log. for debugging
-            asset_info_gather_worker.p4_log_received.connect(
-                self.handle_raw_perforce_log
+        self.ui.interactive = True
+
+    def saved_excluded_extensions(self):
+        """
+        Extensions the user's saved filters exclude, when filters are applied
+        while gathering. Their filter entries are listed upfront, since no row
+        will bring them in, so they can be enabled again before a rescan.
+        """
+        if not self.parent_sgtk_app.get_setting("gather_filter_pushdown", False):
+            return set()
+
+        ext_filters = self.ui.utils.prefs.read().get("ext_filters") or {}
+        excluded = {ext.lower() for ext, enabled in ext_filters.items() if not enabled}
+        for ext in sorted(excluded):
+            self.ui.update_available_filters(("ext", ext))
+        if excluded:
+            self.ui.add_log(
+                "Leaving out {} files as filtered. Enable them and Rescan to "
+                "list them.".format(", ".join("." + ext for ext in sorted(excluded)))
             )
+        return excluded
 
-            # this adds to the threadpool and runs the `run` method on the QRunner.
-            self.threadpool.start(asset_info_gather_worker)
+    def start_gather_worker(
+        self, entity, nested=None, asset_item=None, root_path=None, priority=0
+    ):
+        """
+        Create a gather worker for the entity, wire its signals into the result
+        buffer and start it on the threadpool.
 
-        self.ui.interactive = True
+        Args:
+            entity (dict): entity to gather what there is to sync for
+            nested (list): entities nested under the entity root, see RootPlanner
+            asset_item (dict): already resolved entity info, skips resolving it
+            root_path (str): shard of the entity root to gather instead of all of it
+            priority (int): threadpool priority, higher starts first
+        """
+        asset_info_gather_worker = AssetInfoGatherWorker(
+            app=self.parent_sgtk_app, entity=entity, framework=self.fw
+        )
+
+        asset_info_gather_worker.force = self.ui._force_sync.isChecked()
+        asset_info_gather_worker.gather_mode = self.parent_sgtk_app.get_setting(
+            "gather_mode", "fstat"
+        )
+        asset_info_gather_worker.up_to_date_precheck = (
+            self.parent_sgtk_app.get_setting("gather_up_to_date_precheck", True)
+        )
+        asset_info_gather_worker.gather_cache_ttl = (
+            self.parent_sgtk_app.get_setting("gather_cache_ttl_hours", 12.0)
+        )
+        asset_info_gather_worker.shard_threshold = self.parent_sgtk_app.get_setting(
+            "gather_shard_threshold", 50000
+        )
+        asset_info_gather_worker.nested_roots = nested or []
+        asset_info_gather_worker.excluded_extensions = self.excluded_extensions
+        asset_info_gather_worker.filter_pushdown = self.parent_sgtk_app.get_setting(
+            "gather_filter_pushdown_server", True
+        )
+        if root_path:
+            asset_info_gather_worker.asset_item = asset_item
+            asset_info_gather_worker.root_override = root_path
+            asset_info_gather_worker.shard = True
+        asset_info_gather_worker.pool = self.connection_pool
+        asset_info_gather_worker.cancelled = self.cancel_event
+        # worker signals are delivered straight into the result buffer from the
+        # worker thread, and drained on the UI thread in batches.
+        self.buffer_results(
+            asset_info_gather_worker.total_items_found, "progress"
+        )
+        # as workers emit the item_found_to_sync, buffer the payload from it
+        self.buffer_results(asset_info_gather_worker.item_found_to_sync, "item_found")
+        self.buffer_results(asset_info_gather_worker.info_gathered, "info_gathered")
+        self.buffer_results(asset_info_gather_worker.includes, "includes")
+        self.buffer_results(asset_info_gather_worker.shards_found, "shards")
+
+        # TODO signal for the raw perforce log. for debugging
+        self.buffer_results(asset_info_gather_worker.p4_log_received, "p4_log")
+
+        # this adds to the threadpool and runs the `run` method on the QRunner.
+        self.threadpool.start(asset_info_gather_worker, priority)
+        return asset_info_gather_worker
+
+    def start_shard_workers(self, shard_infos):
+        """
+        Gather the subdirectories of roots too large for a single worker in
+        parallel. Their rows land under the same asset row, which is keyed by
+        asset name.
+
+        Args:
+            shard_infos (list): dictionaries with the entity, its resolved
+                                asset_item, the shards, each with its root
+                                path and the nested entities under it, and the
+                                cancel event of the run they were found in
+        """
+        for shard_info in shard_infos:
+            # the run the root was split in, not necessarily the current one
+            cancelled = shard_info.get("cancelled")
+            if cancelled is not self.cancel_event or cancelled.is_set():
+                continue
+            shards = shard_info.get("shards", [])
+            # counted before the splitting worker reports completion, so the
+            # gather is not considered done until every shard is.
+            self._total += len(shards)
+            for shard in shards:
+                # shards of a huge root go ahead of the entities still queued
+                self.start_gather_worker(
+                    shard_info["entity"],
+                    nested=shard["nested"],
+                    asset_item=shard_info["asset_item"],
+                    root_path=shard["root_path"],
+                    priority=len(self.entities_to_sync) + 1,
+                )
 
     def item_starting_sync(self, status_dict):
+        self.items_starting_sync([status_dict])
+
+    def items_starting_sync(self, status_dicts):
         self.ui.interactive = False
-        # make sure that the item knows its syncing,
-        item = self.item_map.get(status_dict.get("model_item"))
-        item.syncing = True
+        # make sure that the items know they're syncing,
+        for status_dict in status_dicts:
+            item = self.item_map.get(status_dict.get("model_item"))
+            if item:
+                item.syncing = True
         # self.ui.model.refresh()
 
     def item_completed_sync(self, status_dict):
+        self.items_completed_sync([status_dict])
 
-        item = self.item_map.get(status_dict.get("model_item"))
+    def items_completed_sync(self, status_dicts):
+        """
+        Apply a batch of sync results to their rows, with a single progress
+        and log update for the whole batch.
+        """
+        messages = []
+        for status_dict in status_dicts:
+            item = self.item_map.get(status_dict.get("model_item"))
+            if not item:
+                continue
+
+            self.progress_handler.iterate("sync_workers", self.item_weight(item))
+            self.current_count += 1
+            messages.append(
+                "({}) Syncing: {} ...".format(self.current_count, status_dict.get("path"))
+            )
 
-        self.progress_handler.iterate("sync_workers")
-        self.ui.update_progress()
-        self.current_count += 1
-        # self.logger.info(status_dict.get("path"))
-        msg = "({}) Syncing: {} ...".format(self.current_count, status_dict.get("path"))
-        self.ui.add_log(msg)
+            item.syncing = False
 
-        item.syncing = False
+            if status_dict.get("cancelled"):
+                item.cancelled = True
+            elif status_dict.get("error"):
+                item.error = status_dict["error"]
+                self.journal.fail(item.data_in)
+            else:
+                item.cancelled = False
+                item.syncd = True
+                self.journal.complete(item.data_in)
+                if status_dict.get("p4_data"):
+                    item.newrev = status_dict["p4_data"][0].get("rev")
 
-        if status_dict.get("error"):
-            item.error = status_dict["error"]
-        else:
-            item.syncd = True
-            if status_dict.get("p4_data"):
-                item.newrev = status_dict["p4_data"][0].get("rev")
+        self.ui.update_progress()
+        if messages:
+            self.ui.add_log("\n".join(messages))
 
         self.ui.interactive = True
         # self.ui.model.refresh()
 
+    @property
+    def parallel_sync_threads(self):
+        return self.parent_sgtk_app.get_setting("sync_parallel_threads", 0)
+
+    @property
+    def parallel_sync(self):
+        """
+        Whether the user asked for perforce's native parallel transfer
+        """
+        return self.parallel_sync_threads > 1 and self.ui._parallel_sync.isChecked()
+
+    @property
+    def sync_batch_size(self):
+        return max(1, self.parent_sgtk_app.get_setting("sync_batch_size", 200))
+
+    @property
+    def sync_batch_bytes(self):
+        megabytes = self.parent_sgtk_app.get_setting("sync_batch_megabytes", 1024)
+        return max(0, megabytes) * 1024 * 1024
+
+    def sync_batches(self):
+        """
+        Group the visible sync rows of every asset into batches so that each
+        batch can be handed to perforce with a single sync call. Rows are
+        registered in the item map as they are batched. Within an asset,
+        selected rows are batched first and smaller files before larger ones.
+
+        Returns:
+            list: dictionaries with the asset name, the items of the batch,
+                  the gather roots of the asset, whether it holds selected
+                  rows and its size in bytes
+        """
+        selected_ids = self.ui.selected_row_ids()
+
+        batches = []
+        for asset in self.ui.model.rootItem.childItems:
+            asset_name = asset.data(1).split(" ")[0] if asset.data(1) else None
+
+            items = []
+            root_paths = set()
+            for sync_item in asset.childItems:
+                if sync_item.should_be_visible:
+                    self.item_map[sync_item.id] = sync_item
+                    root_paths.add(sync_item.data_in.get("detail"))
+                    item_found = sync_item.data_in.get("item_found", {})
+                    items.append(
+                        {
+                            "id": sync_item.id,
+                            "path": sync_item.data(5),
+                            "depot_path": item_found.get("depotFile"),
+                            "rev": item_found.get("rev"),
+                            "size": int(item_found.get("fileSize") or 0),
+                            "selected": sync_item.id in selected_ids,
+                        }
+                    )
+            items.sort(key=lambda item: (not item["selected"], item["size"]))
+
+            for batch_items in self.split_by_bytes(items):
+                batches.append(
+                    {
+                        "asset_name": asset_name,
+                        "items": batch_items,
+                        # one worker per asset is enough to drop its caches
+                        "root_paths": root_paths,
+                        "selected": any(item["selected"] for item in batch_items),
+                        "size": sum(item["size"] for item in batch_items),
+                    }
+                )
+                root_paths = set()
+        return batches
+
+    def split_by_bytes(self, items):
+        """
+        Chunk items so that no batch exceeds the file count or the byte budget
+        of a batch. A file larger than the budget gets a batch of its own.
+        """
+        byte_budget = self.sync_batch_bytes
+
+        batch = []
+        batch_size = 0
+        for item in items:
+            if batch and (
+                len(batch) >= self.sync_batch_size
+                or (byte_budget and batch_size + item["size"] > byte_budget)
+            ):
+                yield batch
+                batch = []
+                batch_size = 0
+            batch.append(item)
+            batch_size += item["size"]
+        if batch:
+            yield batch
+
+    @staticmethod
+    def item_weight(item):
+        """
+        Bytes a sync row accounts for in the sync progress. Rows without a
+        size (deletes) still weigh a byte so they move the progress.
+        """
+        size = item.data_in.get("item_found", {}).get("fileSize")
+        return max(1, int(size or 0))
+
     def start_sync(self):
         """
         Iterate through assets and their sync items to start workers for all paths that require syncs.
-        Utilize a global threadpool to process
+        Utilize the dedicated sync scheduler to process
         """
         msg = "\n Syncing Files ...\n"
         self.ui.add_log(msg)
 
         self.ui.interactive = False
+        self.start_run()
 
         if not self.ui.progress_handler:
             self.ui.progress_handler = self.progress_handler
@@ -327,34 +855,62 @@ class SyncApp:
         # hold a map to our items while they process
         self.item_map = {}
 
-        workers = []
-        for asset in self.ui.model.rootItem.childItems:
-            for sync_item in asset.childItems:
-
-                if sync_item.should_be_visible:
-                    # log.debug("THIS IS SYNC_ITEM: {}".format(sync_item.data_in))
-                    sync_worker = SyncWorker()
-
-                    self.item_map[sync_item.id] = sync_item
-                    sync_worker.id = sync_item.id
-
-                    sync_worker.path_to_sync = sync_item.data(5)
-                    sync_worker.asset_name = sync_item.parent().data(1).split(" ")[0]
-
-                    sync_worker.fw = self.fw
-
-                    sync_worker.started.connect(self.item_starting_sync)
-                    sync_worker.completed.connect(self.item_completed_sync)
-
-                    workers.append(sync_worker)
+        batches = self.sync_batches()
+        self.journal.plan(
+            self.entities_to_sync, [item.data_in for item in self.item_map.values()]
+        )
+        if self.parallel_sync and batches:
+            # perforce parallelizes the transfer itself, so the whole session
+            # goes out as one batch rather than many python runnables.
+            batches = [
+                {
+                    "asset_name": None,
+                    "items": [item for batch in batches for item in batch["items"]],
+                    "root_paths": set().union(
+                        *(batch["root_paths"] for batch in batches)
+                    ),
+                    "selected": False,
+                    "size": sum(batch["size"] for batch in batches),
+                }
+            ]
+
+        # one bucket shared by every worker caps the bandwidth of the session
+        throttle = TokenBucket.from_megabytes(
+            self.parent_sgtk_app.get_setting("sync_bandwidth_limit", 0)
+        )
 
-        queue_length = len(workers)
+        workers = []
+        for batch in batches:
+            if self.parallel_sync:
+                sync_worker = ParallelSyncWorker(items=batch["items"])
+                sync_worker.threads = self.parallel_sync_threads
+                sync_worker.batch = max(
+                    1, self.parent_sgtk_app.get_setting("sync_parallel_batch", 8)
+                )
+            else:
+                sync_worker = BatchSyncWorker(items=batch["items"])
+            sync_worker.asset_name = batch["asset_name"]
+            sync_worker.root_paths = batch["root_paths"]
+            sync_worker.selected = batch["selected"]
+            sync_worker.size = batch["size"]
+            sync_worker.fw = self.fw
+            sync_worker.pool = self.connection_pool
+            sync_worker.force = self.ui._force_sync.isChecked()
+            sync_worker.throttle = throttle
+            sync_worker.cancelled = self.cancel_event
+
+            self.buffer_results(sync_worker.started, "sync_started")
+            self.buffer_results(sync_worker.completed, "sync_completed")
+
+            workers.append(sync_worker)
+
+        # progress is tracked in bytes so large files weigh in accordingly
+        queue_bytes = sum(self.item_weight(item) for item in self.item_map.values())
         self.progress_handler.queue = {}
         self.progress_handler.track_progress(
-            **{"items": queue_length, "id": "sync_workers"}
+            **{"items": queue_bytes, "id": "sync_workers"}
         )
-        for worker in workers:
-            self.threadpool.start(worker)
+        self.sync_scheduler.schedule(workers)
 
         self.ui.interactive = True
 
@@ -362,6 +918,23 @@ class SyncApp:
         # self.ui.add_log(msg)
 
 
+    def handle_raw_perforce_logs(self, perforce_datas):
+        """
+        Add a batch of raw perforce records to the log in one update
+        """
+        messages = [self.raw_perforce_log_message(i) for i in perforce_datas]
+        messages = [i for i in messages if i]
+        if messages:
+            self.ui.add_log("\n".join(messages))
+
+    def raw_perforce_log_message(self, perforce_data):
+        if isinstance(perforce_data, dict):
+            depotfile = perforce_data.get("depotFile")
+            change = perforce_data.get("change")
+            return "depotfile: {}  |  Change: {}".format(depotfile, change)
+        elif isinstance(perforce_data, str):
+            return perforce_data
+
     def handle_raw_perforce_log(self, perforce_data):
         """
         Description:
@@ -370,14 +943,7 @@ class SyncApp:
         perforce_data -> Dict:
             raw data extracted from perforce
         """
-        if isinstance(perforce_data, dict):
-            depotfile = perforce_data.get("depotFile")
-            change = perforce_data.get("change")
-
-            message = "depotfile: {}  |  Change: {}".format(depotfile, change)
-
-        elif isinstance(perforce_data, str):
-            message = perforce_data
+        message = self.raw_perforce_log_message(perforce_data)
         # self.ui.log_window.addItem(message)
         self.ui.add_log(message)
 
@@ -161,6 +161,18 @@ class MultiModel(QtCore.QAbstractItemModel):
         self.layoutChanged.emit()
 
     def add_row(self, data_item):
+        if self._add_row(data_item):
+            self.refresh()
+
+    def add_rows(self, data_items):
+        """
+        Add a batch of rows, refreshing the views once for the whole batch
+        """
+        added = [self._add_row(data_item) for data_item in data_items]
+        if any(added):
+            self.refresh()
+
+    def _add_row(self, data_item):
         if data_item.get("asset_name"):
             if not self.primary_roots.get(data_item["asset_name"]):
                 asset_item = Row(
@@ -179,7 +191,8 @@ class MultiModel(QtCore.QAbstractItemModel):
                     resolver=self.resolver,
                 )
 
-            self.refresh()
+            return True
+        return False
 
         # lines is our list
 
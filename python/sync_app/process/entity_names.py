@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+import sgtk
+
+logger = sgtk.platform.get_logger(__name__)
+
+
+class EntityNameCache:
+    def __init__(self, field="code"):
+        """
+        Process-wide cache of ShotGrid entity names keyed by (type, id),
+        shared by every gather worker so that resolving the name of an entity
+        costs at most one ShotGrid round trip per session, and none when the
+        names were prefetched in bulk.
+
+        Args:
+            field (str): name field queried on the entities
+        """
+        self.field = field
+        self._names = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(entity):
+        return (entity.get("type"), entity.get("id"))
+
+    def seed(self, entity):
+        """
+        Remember the name carried by an entity dictionary, if any
+        """
+        if entity and entity.get(self.field):
+            with self._lock:
+                self._names[self.key(entity)] = entity.get(self.field)
+
+    def prefetch(self, shotgun, entities):
+        """
+        Resolve the names of all the given entities, and of the entities they
+        link to, with one query per entity type.
+
+        Args:
+            shotgun: ShotGrid API handle
+            entities (list): entity dictionaries with at least type and id
+        """
+        missing = OrderedDict()
+        for entity in entities or []:
+            for candidate in (entity, entity.get("entity")):
+                if not candidate or not candidate.get("id"):
+                    continue
+                self.seed(candidate)
+                if self.key(candidate) not in self._names:
+                    missing.setdefault(candidate.get("type"), set()).add(
+                        candidate.get("id")
+                    )
+
+        for entity_type, ids in missing.items():
+            try:
+                results = shotgun.find(
+                    entity_type, [["id", "in", sorted(ids)]], [self.field]
+                )
+            except Exception as e:
+                # names are resolved one by one later on instead
+                logger.warning(
+                    "Could not prefetch {} names: {}".format(entity_type, e)
+                )
+                continue
+            with self._lock:
+                for result in results:
+                    self._names[self.key(result)] = result.get(self.field)
+
+    def name(self, shotgun, entity):
+        """
+        Name of the entity, queried from ShotGrid only if it was never seen.
+        """
+        key = self.key(entity)
+        with self._lock:
+            if key in self._names:
+                return self._names[key]
+
+        name = entity.get(self.field)
+        if not name:
+            result = shotgun.find_one(
+                entity.get("type"), [["id", "is", entity.get("id")]], [self.field]
+            )
+            name = result.get(self.field) if result else None
+
+        with self._lock:
+            self._names[key] = name
+        return name
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+
+
+# shared by the gather workers of every sync dialog of the process
+ENTITY_NAMES = EntityNameCache()
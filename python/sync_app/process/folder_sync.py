@@ -0,0 +1,134 @@
+import threading
+import time
+
+import sgtk
+
+from ..utils.local_workspace import PrefFile
+from .resolver_cache import RESOLVER_CACHE
+
+logger = sgtk.platform.get_logger(__name__)
+
+
+class FolderSync:
+    def __init__(self, filename=".psdf_folder_sync"):
+        """
+        Process-wide handling of the toolkit folder sync
+        (synchronize_filesystem_structure) the sync dialog relies on to resolve
+        entity root paths. The time of the last folder sync of every pipeline
+        configuration is stored next to the user prefs, so launches within the
+        configured TTL skip it, and it can run in the background while the
+        gather starts. Workers whose root does not resolve wait for it.
+
+        Args:
+            filename (str): name of the folder sync state file in the user's home
+        """
+        self.filename = filename
+        self._lock = threading.Lock()  # held for the whole folder sync
+        self._thread_lock = threading.Lock()  # guards the background thread
+        self._ensure_lock = threading.Lock()
+        self._thread = None
+        self._synced_at = 0  # when a folder sync last completed in this process
+        self._launched_at = 0  # when the last dialog was opened
+
+    @staticmethod
+    def key(app):
+        return app.sgtk.pipeline_configuration.get_path()
+
+    def last_sync(self, app):
+        return PrefFile(filename=self.filename).data.get(self.key(app), 0)
+
+    def stale(self, app, ttl_minutes):
+        if ttl_minutes <= 0:
+            return True
+        return time.time() - self.last_sync(app) > ttl_minutes * 60
+
+    def run(self, app):
+        """
+        Synchronize the folder structure now and record when it happened.
+        """
+        with self._lock:
+            synclog = app.engine.sgtk.synchronize_filesystem_structure()
+            app.log_debug(f"Synced Folders: {synclog}")
+
+            state = PrefFile(filename=self.filename)
+            state.data[self.key(app)] = time.time()
+            state.write(state.data)
+            self._synced_at = time.time()
+
+        # roots resolved before the folders existed are stale
+        RESOLVER_CACHE.invalidate()
+
+    def _run_logged(self, app):
+        try:
+            self.run(app)
+        except Exception:
+            import traceback
+
+            app.log_error("Folder sync failed!")
+            app.log_error(traceback.format_exc())
+
+    def launch(self, app):
+        """
+        Folder sync on opening the dialog, according to the app settings:
+        skipped within `folder_sync_ttl_minutes` of the last one, otherwise run
+        in the background if `folder_sync_async` is set, or right away.
+        """
+        self._launched_at = time.time()
+        thread = self._thread
+        if thread and thread.is_alive():
+            # still running for a previous dialog, it was not recorded yet
+            return
+
+        ttl_minutes = app.get_setting("folder_sync_ttl_minutes", 60)
+        if not self.stale(app, ttl_minutes):
+            logger.info("Folders synced less than {} minutes ago, skipping".format(
+                ttl_minutes
+            ))
+            return
+
+        if not app.get_setting("folder_sync_async", True):
+            self.run(app)
+            return
+
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run_logged, args=(app,), name="folder_sync"
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def wait(self):
+        """
+        Wait for a folder sync running in the background, if any
+        """
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join()
+
+    def ensure(self, app, since):
+        """
+        Called when an entity root fails to resolve: wait for a folder sync in
+        progress, or run one if none completed since the dialog was opened.
+
+        Args:
+            since (float): time the root was resolved at
+
+        Returns:
+            bool: True if folders were synced after the root was resolved
+        """
+        self.wait()
+
+        with self._ensure_lock:
+            if self._synced_at > since:
+                return True
+            if self._synced_at and self._synced_at >= self._launched_at:
+                # folders were synced already, the root is genuinely missing
+                return False
+            self._run_logged(app)
+            return self._synced_at > since
+
+
+# shared by every sync dialog of the process
+FOLDER_SYNC = FolderSync()
@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+
+
+class ResolverCache:
+    def __init__(self, maxsize=2048):
+        """
+        Process-wide, thread-safe LRU cache of what the TemplateResolver
+        resolves per entity (context, root path), keyed by (type, id) and the
+        name of the resolved value. Rescans and later dialogs of the same
+        session reuse it instead of going through the toolkit path cache again.
+
+        Args:
+            maxsize (int): number of values kept before the least recently
+                           used are dropped
+        """
+        self.maxsize = maxsize
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    _MISSING = object()
+
+    @staticmethod
+    def key(entity, name):
+        return (entity.get("type"), entity.get("id"), name)
+
+    def get(self, entity, name, resolve):
+        """
+        Cached value of the entity, computed with `resolve()` on a miss.
+        Exceptions raised by `resolve` are not cached.
+        """
+        key = self.key(entity, name)
+        with self._lock:
+            value = self._values.get(key, self._MISSING)
+            if value is not self._MISSING:
+                self._values.move_to_end(key)
+                return value
+
+        # resolved outside the lock, toolkit calls can take a while
+        value = resolve()
+        self.put(entity, name, value)
+        return value
+
+    def put(self, entity, name, value):
+        key = self.key(entity, name)
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+    def invalidate(self, entity=None):
+        """
+        Drop what is cached for an entity, or everything if none is given
+        """
+        with self._lock:
+            if entity is None:
+                self._values.clear()
+                return
+            for key in [
+                key for key in self._values
+                if key[:2] == (entity.get("type"), entity.get("id"))
+            ]:
+                del self._values[key]
+
+
+# shared by the template resolvers of every sync dialog of the process
+RESOLVER_CACHE = ResolverCache()
@@ -0,0 +1,86 @@
+import sgtk
+
+from ..utils.prefix_index import PathPrefixIndex
+from .template_resolver import TemplateResolver
+
+logger = sgtk.platform.get_logger(__name__)
+
+
+class RootPlanner:
+    def __init__(self, app=None):
+        """
+        Plans which gather worker covers which entity roots before any
+        perforce work starts. Entities whose root lies inside the root of
+        another entity are not gathered on their own: they are handed to the
+        worker of the outer root, which attributes each file to the deepest
+        root containing it. Every depot file is therefore gathered, shown and
+        synced once, under exactly one entity.
+        """
+        self.app = app
+
+    def root_path(self, entity):
+        """
+        Root path of an entity as the gather worker resolves it, None if it
+        does not resolve to a single path.
+        """
+        try:
+            if entity.get("type") in ["PublishedFile"]:
+                return (entity.get("path") or {}).get("local_path")
+            # resolved the way the worker does, which then hits the cache
+            return TemplateResolver(app=self.app, entity=entity).root_path2
+        except Exception as e:
+            logger.debug("No root planned for {}: {}".format(entity, e))
+            return None
+
+    def plan(self, entities):
+        """
+        Collapse nested and duplicate roots.
+
+        Args:
+            entities (list): entities to gather
+
+        Returns:
+            list: one dictionary per gather worker to start, with the "entity"
+                  it gathers and the "nested" entities under its root, each as
+                  {"entity": ..., "root_path": ...}
+        """
+        resolved = []
+        plans = []
+        for entity in entities or []:
+            root_path = self.root_path(entity)
+            if root_path:
+                resolved.append((entity, root_path))
+            else:
+                # the worker reports why the root does not resolve
+                plans.append({"entity": entity, "nested": []})
+
+        # outer roots first, so nested ones always find their owner
+        resolved.sort(key=lambda pair: len(PathPrefixIndex.split(pair[1])))
+
+        owners = PathPrefixIndex()
+        seen = set()
+        for entity, root_path in resolved:
+            key = tuple(PathPrefixIndex.split(root_path))
+            owner = owners.lookup(root_path)
+            if key in seen:
+                logger.info(
+                    "{} {} shares its root with another entity, its files are "
+                    "gathered once under the first one".format(
+                        entity.get("type"), entity.get("id")
+                    )
+                )
+                continue
+            seen.add(key)
+
+            if owner:
+                owner["nested"].append({"entity": entity, "root_path": root_path})
+                owners.add(root_path, owner)
+            else:
+                plan = {"entity": entity, "nested": []}
+                plans.append(plan)
+                owners.add(root_path, plan)
+
+        # keep the order entities came in
+        positions = {id(entity): i for i, entity in enumerate(entities or [])}
+        plans.sort(key=lambda plan: positions[id(plan["entity"])])
+        return plans
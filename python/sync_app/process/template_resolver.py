@@ -2,7 +2,11 @@ import os
 import sys
 import sgtk
 import traceback
+from collections import OrderedDict
 from ..utils.inspection import method_decorator, trace
+from .resolver_cache import RESOLVER_CACHE
+
+logger = sgtk.platform.get_logger(__name__)
 
 
 # @method_decorator(trace)
@@ -61,8 +65,12 @@ class TemplateResolver:
     @property
     def context(self):
         if self.entity:
-            return self.app.sgtk.context_from_entity(
-                self.entity["type"], self.entity["id"]
+            return RESOLVER_CACHE.get(
+                self.entity,
+                "context",
+                lambda: self.app.sgtk.context_from_entity(
+                    self.entity["type"], self.entity["id"]
+                ),
             )
 
     def prepare_folders(self):
@@ -71,13 +79,57 @@ class TemplateResolver:
             self.entity["type"], self.entity["id"]
         )
 
+    @staticmethod
+    def prepare_all_folders(app, entities):
+        """
+        Create the folders of every entity whose root path does not resolve
+        yet, with one create_filesystem_structure call per entity type rather
+        than one per entity from each worker thread.
+
+        Args:
+            app: sgtk app
+            entities (list): entities about to be gathered
+        """
+        missing = OrderedDict()
+        for entity in entities or []:
+            if entity.get("type") in ["PublishedFile"] or not entity.get("id"):
+                continue
+            try:
+                paths = RESOLVER_CACHE.get(
+                    entity,
+                    "paths",
+                    lambda: app.sgtk.paths_from_entity(entity["type"], entity["id"]),
+                )
+            except Exception:
+                paths = []
+            if not paths:
+                missing.setdefault(entity["type"], []).append(entity["id"])
+
+        for entity_type, ids in missing.items():
+            try:
+                app.sgtk.create_filesystem_structure(entity_type, ids)
+            except Exception as e:
+                # workers report the entities whose root still does not resolve
+                logger.warning(
+                    "Could not create folders for {} {}: {}".format(entity_type, ids, e)
+                )
+                continue
+            for entity_id in ids:
+                RESOLVER_CACHE.invalidate({"type": entity_type, "id": entity_id})
+
     @property
     def root_path2(self):
         if self._incoming_entity.get("type") in ["PublishedFile"]:
             return self._incoming_entity.get("path_cache")
         else:
             # self.app.log_info(self.template_fields)
-            templated_path = self.app.sgtk.paths_from_entity(self.entity["type"],self.entity["id"])
+            templated_path = RESOLVER_CACHE.get(
+                self.entity,
+                "paths",
+                lambda: self.app.sgtk.paths_from_entity(
+                    self.entity["type"], self.entity["id"]
+                ),
+            )
             if len(templated_path) == 1:
                 return os.path.join(templated_path[0],"...")
             else:
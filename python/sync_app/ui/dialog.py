@@ -14,6 +14,7 @@ from tank.platform.qt import QtCore, QtGui
 from tank.platform.qt5 import QtWidgets
 
 from ..workers.sync_worker import SyncWorker, AssetInfoGatherWorker
+from ..workers.publish_prefetch import PUBLISH_FIELDS
 from ..utils.local_workspace import open_browser
 from .base_ui import Ui_Generic
 from ..models.multi_model import MultiModel
@@ -78,6 +79,10 @@ class Ui_Dialog(Ui_Generic):
         self._sg_data = {}
         self._row_data = {}
 
+        # depot path -> latest publish, filled in the background after gathering
+        self._publish_index = {}
+        self._publish_index_ready = False
+
         self._key = None
         self._id = 0
         self.dir_path = tempfile.mkdtemp()
@@ -102,6 +107,20 @@ class Ui_Dialog(Ui_Generic):
             if key not in self._row_data.keys():
                 self._row_data[key] = row_data[key]
 
+    def update_publish_index(self, index_chunks):
+        """
+        Merge publishes prefetched in the background into the publish index
+        """
+        for index_chunk in index_chunks:
+            self._publish_index.update(index_chunk)
+
+    def publish_index_ready(self, *args):
+        self._publish_index_ready = True
+
+    def reset_publish_index(self):
+        self._publish_index = {}
+        self._publish_index_ready = False
+
     def get_sg_data(self, app, dict_data):
         """
         Merge dict_data into self._sg_data
@@ -155,7 +174,13 @@ class Ui_Dialog(Ui_Generic):
         self._hide_syncd = QtGui.QCheckBox()  # create hide if nothing to sync toggle
         self._force_sync = QtGui.QCheckBox()  # create the force sync toggle
         self._force_sync.setText("Force Sync")
+        self._parallel_sync = QtGui.QCheckBox()  # create the parallel transfer toggle
+        self._parallel_sync.setText("Parallel Transfer")
+        self._parallel_sync.setToolTip(
+            "Hand the whole sync to Perforce's parallel file transfer. Recommended for very large syncs."
+        )
         self._rescan = QtGui.QPushButton("Rescan")
+        self._cancel = QtGui.QPushButton("Cancel")  # always enabled, stops the current run
         self.tree_view = QtGui.QTreeView()
 
         self._perforce_log_viewstate = QtGui.QCheckBox()
@@ -228,7 +253,10 @@ class Ui_Dialog(Ui_Generic):
         self.sync_layout = QtGui.QHBoxLayout()
         self.sync_layout.addWidget(self._rescan, 3)
         self.sync_layout.addWidget(self._do, 10)
+        self.sync_layout.addWidget(self._cancel, 2)
         self.sync_layout.addWidget(self._force_sync, 1)
+        self.sync_layout.addWidget(self._parallel_sync, 1)
+        self._parallel_sync.setVisible(self.app.parallel_sync_threads > 1)
 
         # perforce log layout
         self.perforce_log_layout = QtGui.QVBoxLayout()
@@ -372,7 +400,7 @@ class Ui_Dialog(Ui_Generic):
         self._perforce_log_viewstate.clicked.connect(self.toggle_perforce_log)
 
         # _menu_layout
-        for widget in [self._do, self._force_sync, self._rescan]:  # , self.tree_view]:
+        for widget in [self._do, self._force_sync, self._parallel_sync, self._rescan]:  # , self.tree_view]:
             self.centrally_control_enabled_state(widget)
 
         self._menu_layout.addWidget(self._reset_filters)
@@ -384,6 +412,7 @@ class Ui_Dialog(Ui_Generic):
         self._menu_layout.addWidget(self.info)
 
         self._rescan.clicked.connect(self.rescan)
+        self._cancel.clicked.connect(self.cancel)
 
         self.resize(1250, 800)
 
@@ -487,6 +516,12 @@ class Ui_Dialog(Ui_Generic):
         else:
             logger.info("Interactivity is disabled temporarily ")
 
+    def cancel(self):
+        """
+        Stop the gather or sync run in flight
+        """
+        self.app.cancel()
+
     def setup_events(self):
         pass
         # self._do.clicked.connect(self.start_sync)
@@ -519,9 +554,17 @@ class Ui_Dialog(Ui_Generic):
             if not self.progress_handler.progress == 1:
                 self._progress_bar.setValue(self.progress_handler.progress * 100)
 
+                eta = self.progress_handler.eta
+                if eta is not None:
+                    minutes, seconds = divmod(int(eta), 60)
+                    self._progress_bar.setFormat(
+                        "%p%  (ETA {}m {:02d}s)".format(minutes, seconds)
+                    )
+
             else:
                 self._progress_bar.setVisible(False)
                 self._progress_bar.setValue(0)
+                self._progress_bar.setFormat("%p%")
                 self._global_progress_bar.setVisible(False)
                 self._global_progress_bar.setValue(0)
 
@@ -608,15 +651,14 @@ class Ui_Dialog(Ui_Generic):
         Get SG Publish Dict
         """
         sg_data_dict = {}
-        if key:
+        if key in self._publish_index:
+            sg_data_dict = self._publish_index[key]
+        elif key and not self._publish_index_ready:
+            # not prefetched yet, look it up and remember it
             filters = [["sg_p4_depo_path", "in", [key]]]
-            fields = ['code', 'created_at', 'created_by', 'created_by.HumanUser.image', 'description',
-                      'entity', 'id', 'image', 'name', 'path', 'project', 'published_file_type',
-                      'sg_status_list', 'task', 'task.Task.content', 'task.Task.due_date',
-                      'task.Task.sg_status_list', 'task_uniqueness', 'type', 'version',
-                      'version.Version.sg_status_list', 'version_number', "task.Task.step.Step.code"]
             order = [{'field_name': 'version_number', 'direction': 'desc'}]
-            sg_data_dict = self._sg.find_one('PublishedFile', filters, fields, order)
+            sg_data_dict = self._sg.find_one('PublishedFile', filters, PUBLISH_FIELDS, order)
+            self._publish_index[key] = sg_data_dict or {}
         """
         logger.info("key: {}".format(key))
         logger.info("sg_data_dict is:")
@@ -834,6 +876,25 @@ class Ui_Dialog(Ui_Generic):
 
             self.details_header.updateGeometry()
 
+    def selected_row_ids(self):
+        """
+        Ids of the sync rows selected in the tree. Selecting an asset row
+        selects all of its sync rows.
+
+        Returns:
+            set: Row ids
+        """
+        ids = set()
+        for index in self.tree_view.selectionModel().selectedRows():
+            item = self.proxy_model.mapToSource(index).internalPointer()
+            if not item:
+                continue
+            if item.schema.schema_type == "asset_item":
+                ids.update(child.id for child in item.childItems)
+            else:
+                ids.add(item.id)
+        return ids
+
     def on_item_clicked(self, index):
         """
         Single click on tree item
@@ -1195,6 +1256,7 @@ class Ui_Dialog(Ui_Generic):
             # gracefully close all connections
             shotgun_globals.unregister_bg_task_manager(self._task_manager)
             self._task_manager.shut_down()
+            self.app.shutdown()
 
             # remove temp image directory
             shutil.rmtree(self.dir_path)
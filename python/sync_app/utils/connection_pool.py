@@ -0,0 +1,128 @@
+import threading
+from contextlib import contextmanager
+
+import sgtk
+
+logger = sgtk.platform.get_logger(__name__)
+
+
+class ConnectionPool:
+    def __init__(self, fw, size=8):
+        """
+        Thread-aware pool of reusable perforce connections. Workers check a
+        connection out for the duration of their p4 work and hand it back
+        afterwards, so that no two threads ever share a P4 instance and no
+        worker pays for connecting and logging in on its own.
+
+        Args:
+            fw: tk-framework-perforce instance used to open new connections
+            size (int): maximum number of connections open at the same time
+        """
+        self.fw = fw
+        self.size = max(1, size)
+
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def healthy(p4):
+        """
+        Cheap check that a pooled connection can still be used.
+        """
+        try:
+            return bool(p4.connected())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _disconnect(p4):
+        try:
+            if p4.connected():
+                p4.disconnect()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Check a connection out of the pool, blocking while every connection
+        is in use. Stale connections are replaced by fresh ones.
+        """
+        p4 = None
+        with self._condition:
+            while not self._idle and self._open >= self.size:
+                self._condition.wait()
+            if self._idle:
+                p4 = self._idle.pop()
+            else:
+                # reserve the slot before connecting outside of the lock
+                self._open += 1
+
+        if p4 is not None and not self.healthy(p4):
+            logger.debug("Replacing stale perforce connection: {}".format(p4))
+            self._disconnect(p4)
+            p4 = None
+
+        if p4 is None:
+            try:
+                p4 = self.fw.connection.connect()
+            except Exception:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise
+        return p4
+
+    def release(self, p4, discard=False):
+        """
+        Return a connection to the pool. Connections that are no longer
+        healthy, or that the caller asks to discard, are closed instead.
+        """
+        with self._condition:
+            if discard or self._closed or not self.healthy(p4):
+                self._disconnect(p4)
+                self._open -= 1
+            else:
+                self._idle.append(p4)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager checking a connection out for the duration of the block
+        """
+        p4 = self.acquire()
+        try:
+            yield p4
+        except Exception:
+            self.release(p4, discard=not self.healthy(p4))
+            raise
+        else:
+            self.release(p4)
+
+    def close(self):
+        """
+        Disconnect every idle connection. Connections still checked out are
+        closed when they are released.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for p4 in idle:
+            self._disconnect(p4)
+
+
+@contextmanager
+def checkout(pool=None, fw=None):
+    """
+    Check a connection out of the given pool, or open a dedicated connection
+    through the framework when the caller is not handed a pool.
+    """
+    if pool:
+        with pool.connection() as p4:
+            yield p4
+    else:
+        yield fw.connection.connect()
@@ -0,0 +1,118 @@
+import os
+import time
+import hashlib
+
+from .local_workspace import PrefFile
+
+
+class GatherCache(PrefFile):
+
+    # records of every file to sync, these get large
+    indent = None
+
+    def __init__(self, client, root_path, ttl_hours=12.0, directory=".psdf_gather_cache"):
+        """
+        On-disk cache of what a gather found to sync under one root of one
+        workspace. It is stamped with the newest changelist submitted under the
+        root when it was computed, so a later gather only has to revalidate the
+        files touched by newer changelists.
+
+        Args:
+            client (str): perforce workspace name
+            root_path (str): depot or local root path the gather ran on
+            ttl_hours (float): hours after which the cache is not trusted anymore
+            directory (str): folder of the cache files in the user's home
+        """
+        self.client = client
+        self.root_path = root_path
+        self.ttl = ttl_hours * 3600
+
+        folder = os.path.join(os.path.expanduser("~"), directory)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        super(GatherCache, self).__init__(
+            filename=self.filename(client, root_path, directory)
+        )
+
+    @staticmethod
+    def filename(client, root_path, directory=".psdf_gather_cache"):
+        """
+        Cache file of a root of a workspace, relative to the user's home
+        """
+        key = hashlib.sha1(
+            "{}|{}".format(client, root_path).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(directory, "{}.json".format(key))
+
+    @classmethod
+    def remove(cls, client, root_path, directory=".psdf_gather_cache"):
+        """
+        Drop the cache of a root of a workspace without reading it first
+        """
+        path = os.path.join(
+            os.path.expanduser("~"), cls.filename(client, root_path, directory)
+        )
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def read(self):
+        try:
+            return super(GatherCache, self).read()
+        except ValueError:
+            # a write cut short leaves unreadable json, start over
+            self.data = {}
+            return self.data
+
+    @property
+    def head_change(self):
+        return self.data.get("head_change", 0)
+
+    @property
+    def files(self):
+        return self.data.get("files", 0)
+
+    @property
+    def records(self):
+        return self.data.get("records", {})
+
+    def valid(self, have_change):
+        """
+        Whether the cache can be used for a workspace that has changes up to
+        `have_change` of the root.
+        """
+        if not self.data or self.ttl <= 0:
+            return False
+        if self.data.get("client") != self.client:
+            return False
+        if self.data.get("root_path") != self.root_path:
+            return False
+        if self.data.get("have_change") != have_change:
+            return False
+        return time.time() - self.data.get("stamp", 0) < self.ttl
+
+    def store(self, head_change, have_change, records, files):
+        """
+        Record the result of a gather.
+
+        Args:
+            head_change (int): newest changelist submitted under the root
+            have_change (int): newest changelist of the root in the workspace
+            records (dict): sync records of the files to sync by depot path
+            files (int): number of files the gather looked at
+        """
+        self.data = {
+            "client": self.client,
+            "root_path": self.root_path,
+            "head_change": head_change,
+            "have_change": have_change,
+            "stamp": time.time(),
+            "files": files,
+            "records": records,
+        }
+        self.write(self.data)
+
+    def invalidate(self):
+        if self.data:
+            self.data = {}
+            self.write(self.data)
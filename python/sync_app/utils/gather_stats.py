@@ -0,0 +1,52 @@
+from .local_workspace import PrefFile
+
+
+class GatherStats(PrefFile):
+    def __init__(self, filename=".psdf_gather_stats"):
+        """
+        Gather time and file count of every entity in previous sessions,
+        stored next to the user prefs. Used to start the most expensive gathers
+        first so the largest root does not set the tail of the gather.
+
+        Args:
+            filename (str): name of the stats file in the user's home
+        """
+        super(GatherStats, self).__init__(filename=filename)
+
+    @staticmethod
+    def key(entity):
+        return "{}_{}".format(entity.get("type"), entity.get("id"))
+
+    def expected_cost(self, entity):
+        """
+        Seconds the last gather of the entity took, None if never gathered
+        """
+        stats = self.data.get(self.key(entity))
+        return stats.get("duration") if stats else None
+
+    def by_cost(self, items, entity=None):
+        """
+        Items sorted from the most to the least expensive to gather. Entities
+        never gathered before come first, they may well be the largest.
+
+        Args:
+            items (list): entities, or anything `entity` gets the entity of
+            entity (callable): returns the entity of an item
+        """
+        def cost(item):
+            expected = self.expected_cost(entity(item) if entity else item)
+            return (expected is not None, -(expected or 0))
+
+        return sorted(items or [], key=cost)
+
+    def record(self, session):
+        """
+        Remember the gather costs of a session and write them to disk.
+
+        Args:
+            session (dict): entity key to {"duration": seconds, "files": count}
+        """
+        if not session:
+            return
+        self.data.update(session)
+        self.write(self.data)
@@ -8,6 +8,9 @@ logger = logging.getLogger(os.path.basename(__file__))
 
 
 class PrefFile:
+
+    indent = 4  # json indentation of the file, None to write it compact
+
     def __init__(self, filename=".psdf"):
         
         self.root_dir = os.path.expanduser("~")
@@ -18,8 +21,12 @@ class PrefFile:
     def write(self, data=None):
         if not data:
             data = self.data
-        with open(self.pref_file, "w") as file_obj:
-            json.dump(data, file_obj, indent=4)
+        # write aside and swap it in, so a crash mid-write never leaves a
+        # truncated file behind
+        temp_file = self.pref_file + ".tmp"
+        with open(temp_file, "w") as file_obj:
+            json.dump(data, file_obj, indent=self.indent)
+        os.replace(temp_file, self.pref_file)
 
     def read(self):
         if not os.path.isfile(self.pref_file):
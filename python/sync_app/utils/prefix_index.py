@@ -0,0 +1,56 @@
+import os
+
+
+class PathPrefixIndex:
+    def __init__(self):
+        """
+        Maps root paths to values and resolves any path to the value of its
+        deepest registered root. Paths are stored as a trie of path components,
+        so a lookup costs one dictionary hop per component of the looked up
+        path, however many roots are registered.
+        """
+        self._root = {}
+        self._count = 0
+
+    _VALUE = object()  # key of the value stored on a trie node
+
+    @staticmethod
+    def split(path):
+        """
+        Path components of a local or depot path, ignoring separator style,
+        case on case insensitive platforms and trailing perforce wildcards.
+        """
+        path = os.path.normcase(path.replace("\\", "/")).replace("\\", "/")
+        return [
+            part for part in path.split("/") if part and part not in ("...", "*")
+        ]
+
+    def add(self, path, value):
+        node = self._root
+        for part in self.split(path):
+            node = node.setdefault(part, {})
+        if self._VALUE not in node:
+            self._count += 1
+        node[self._VALUE] = value
+
+    def lookup(self, path, default=None):
+        """
+        Value of the deepest registered root containing `path`
+        """
+        found = self._root.get(self._VALUE, default)
+        node = self._root
+        for part in self.split(path):
+            node = node.get(part)
+            if node is None:
+                break
+            found = node.get(self._VALUE, found)
+        return found
+
+    def __setitem__(self, path, value):
+        self.add(path, value)
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return bool(self._count)
@@ -1,3 +1,4 @@
+import time
 import uuid
 
 
@@ -9,6 +10,8 @@ class ProgressTracker:
         self.current = current
         self.min = min
 
+        self.started = time.time()
+
     @property
     def complete(self):
         """
@@ -38,6 +41,21 @@ class ProgressTracker:
                 return float(self.current) / float(self.max)
             return 0.0
 
+    @property
+    def eta(self):
+        """
+        Description:
+            estimates the remaining time from the rate of progress so far
+
+        Returns:
+            [float] seconds left, None until there is progress to estimate from
+        """
+
+        if self.current <= 0 or self.complete:
+            return None
+        elapsed = time.time() - self.started
+        return elapsed / self.current * (self.max - self.current)
+
     def iterate(self, val=1):
         """
         Description: 
@@ -69,8 +87,14 @@ class ProgressHandler:
         self.queue[id] = tracker
         return tracker
 
-    def iterate(self, id):
-        self.queue.get(id).iterate()
+    def iterate(self, id, val=1):
+        self.queue.get(id).iterate(val)
+
+    @property
+    def eta(self):
+        etas = [i.eta for i in self.queue.values() if i.eta is not None]
+        if etas:
+            return max(etas)
 
 
     @property
@@ -0,0 +1,57 @@
+import itertools
+import threading
+from collections import deque
+from functools import partial
+
+
+class ResultBuffer:
+    def __init__(self):
+        """
+        Thread-safe buffer worker results are pushed into from the worker
+        threads, to be drained on the UI thread in batches. Results keep the
+        order they were pushed in, so a worker's completion never overtakes
+        the items it reported before it.
+        """
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._handlers = {}
+        # results pushed for any other run are dropped when drained
+        self.run = None
+
+    def register(self, kind, handler):
+        """
+        Register the UI thread handler of a kind of result. The handler is
+        called with the list of payloads of consecutive results of that kind.
+        """
+        self._handlers[kind] = handler
+
+    def push(self, kind, payload=None, run=None):
+        with self._lock:
+            self._queue.append((kind, payload, run))
+
+    def pusher(self, kind, run=None):
+        """
+        Callable pushing its argument as a result of the given kind, meant to
+        be connected directly to a worker signal. Results tagged with a run are
+        dropped once another run became the current one.
+        """
+        return partial(self.push, kind, run=run)
+
+    def drain(self):
+        """
+        Hand everything buffered so far to the registered handlers, one call
+        per run of consecutive results of the same kind.
+        """
+        with self._lock:
+            if not self._queue:
+                return
+            results = [
+                result for result in self._queue
+                if result[2] is None or result[2] is self.run
+            ]
+            self._queue.clear()
+
+        for kind, group in itertools.groupby(results, key=lambda result: result[0]):
+            handler = self._handlers.get(kind)
+            if handler:
+                handler([payload for _, payload, _ in group])
@@ -0,0 +1,166 @@
+import os
+import time
+
+from .local_workspace import PrefFile
+
+# keys of the gathered row data needed to show a row again when resuming
+JOURNAL_ROW_KEYS = ["asset_name", "ext", "status", "detail"]
+JOURNAL_FILE_KEYS = ["depotFile", "clientFile", "rev", "action", "fileSize", "haveRev"]
+
+
+class SyncJournal(PrefFile):
+    def __init__(
+        self, filename=".psdf_sync_journal", flush_interval=2.0, max_age_hours=24.0
+    ):
+        """
+        On-disk journal of a sync session, stored next to the user prefs. It
+        records every planned row (path, revision, size and the few fields the
+        row is shown with) once when the sync starts, then appends the rows
+        that completed or failed to a log beside it, so that a session
+        interrupted by closing the dialog or a crash can be resumed without
+        gathering again.
+
+        Args:
+            filename (str): name of the journal file in the user's home
+            flush_interval (float): minimum seconds between two appends while
+                                    completions are being recorded
+            max_age_hours (float): hours after which an interrupted session is
+                                   not offered for resuming anymore
+        """
+        self.flush_interval = flush_interval
+        self.max_age = max_age_hours * 3600
+        self._last_flush = 0
+        self._pending = []  # row keys settled since the last flush
+
+        super(SyncJournal, self).__init__(filename=filename)
+
+        self.log_file = self.pref_file + ".log"
+        self.settled = self.read_log()
+
+    def read(self):
+        try:
+            return super(SyncJournal, self).read()
+        except ValueError:
+            # a write cut short leaves unreadable json, start over
+            self.data = {}
+            return self.data
+
+    def read_log(self):
+        """
+        Row keys the log records as completed or failed
+        """
+        if not os.path.isfile(self.log_file):
+            return set()
+        with open(self.log_file, "r") as file_obj:
+            return set(line.rstrip("\n") for line in file_obj if line.strip())
+
+    @staticmethod
+    def entity_keys(entities):
+        return sorted(
+            "{}_{}".format(entity.get("type"), entity.get("id"))
+            for entity in entities or []
+        )
+
+    @staticmethod
+    def row_key(row_data):
+        return row_data.get("item_found", {}).get("clientFile")
+
+    @staticmethod
+    def compact_row(row_data):
+        """
+        The part of a row's data worth journaling
+        """
+        row = {key: row_data.get(key) for key in JOURNAL_ROW_KEYS}
+        item_found = row_data.get("item_found", {})
+        row["item_found"] = {key: item_found.get(key) for key in JOURNAL_FILE_KEYS}
+        return row
+
+    def plan(self, entities, rows):
+        """
+        Record a new sync session, replacing any previous one.
+
+        Args:
+            entities (list): entities the rows were gathered for
+            rows (list): row data dictionaries of every planned sync row
+        """
+        files = {}
+        for row_data in rows:
+            key = self.row_key(row_data)
+            if key:
+                files[key] = self.compact_row(row_data)
+
+        self.clear()
+        self.data = {
+            "entities": self.entity_keys(entities),
+            "created": time.time(),
+            "files": files,
+        }
+        self.write(self.data)
+
+    def complete(self, row_data):
+        """
+        Mark a planned row as synced. The session is dropped from disk once
+        every planned row is settled.
+        """
+        self.settle(row_data)
+
+    def fail(self, row_data):
+        """
+        Mark a planned row as failed, it is not resumed since it would most
+        likely fail again. Rescan to try it once more.
+        """
+        self.settle(row_data)
+
+    def settle(self, row_data):
+        key = self.row_key(row_data)
+        if key not in self.data.get("files", {}) or key in self.settled:
+            return
+
+        self.settled.add(key)
+        self._pending.append(key)
+
+        if len(self.settled) >= len(self.data["files"]):
+            self.clear()
+        else:
+            self.flush()
+
+    def expired(self):
+        if self.max_age <= 0:
+            return False
+        return time.time() - self.data.get("created", 0) > self.max_age
+
+    def remaining_rows(self, entities):
+        """
+        Row data of every row left to sync by an interrupted session of the
+        same entities, empty if there is nothing to resume or the session is
+        too old to be trusted.
+        """
+        if not self.data.get("files") or self.expired():
+            return []
+        if self.data.get("entities") != self.entity_keys(entities):
+            return []
+        return [
+            row for key, row in self.data["files"].items() if key not in self.settled
+        ]
+
+    def flush(self, force=False):
+        """
+        Append the rows settled since the last flush to the log, at most once
+        per flush interval unless forced
+        """
+        if not self._pending:
+            return
+        now = time.time()
+        if force or now - self._last_flush >= self.flush_interval:
+            with open(self.log_file, "a") as file_obj:
+                file_obj.writelines("{}\n".format(key) for key in self._pending)
+            self._pending = []
+            self._last_flush = now
+
+    def clear(self):
+        self.data = {}
+        self.settled = set()
+        self._pending = []
+        self.write(self.data)
+        if os.path.isfile(self.log_file):
+            os.remove(self.log_file)
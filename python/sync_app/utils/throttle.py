@@ -0,0 +1,70 @@
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """
+        Token bucket shared by sync workers to cap the bandwidth used by a
+        sync session. Workers consume the byte size of a batch before
+        transferring it and wait whenever the bucket runs into debt. The cap
+        is an average over the session: each batch still transfers at full
+        link speed, the waits in between bring the rate down.
+
+        Args:
+            rate (float): allowed bytes per second
+            burst (float): bytes that can be transferred without waiting,
+                           defaults to one second worth of transfer
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_megabytes(cls, megabytes_per_second):
+        """
+        Build a bucket from a MB/s setting, None if the setting is disabled
+        """
+        if not megabytes_per_second or megabytes_per_second <= 0:
+            return None
+        rate = megabytes_per_second * 1024 * 1024
+        # a few seconds of burst keeps the number of p4 calls per batch sane
+        return cls(rate, burst=rate * 5)
+
+    def consume(self, amount, cancelled=None):
+        """
+        Take `amount` bytes out of the bucket, blocking until the transfer
+        fits within the allowed rate.
+
+        Args:
+            amount (float): bytes about to be transferred
+            cancelled (threading.Event): interrupts the wait once set
+
+        Returns:
+            bool: False if the wait was cancelled, the bytes are then handed
+                  back since they will not be transferred
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._stamp) * self.rate
+            )
+            self._stamp = now
+            # going negative puts the bucket in debt, which every following
+            # consumer waits out as well, keeping the shared rate in check.
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if not wait:
+            return True
+        if cancelled is None:
+            time.sleep(wait)
+            return True
+        if cancelled.wait(wait):
+            with self._lock:
+                self._tokens += amount
+            return False
+        return True
@@ -0,0 +1,97 @@
+import traceback
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from ..process.entity_names import ENTITY_NAMES
+from ..process.folder_sync import FOLDER_SYNC
+from ..process.root_planner import RootPlanner
+from ..process.template_resolver import TemplateResolver
+from ..utils.prefix_index import PathPrefixIndex
+
+logger = sgtk.platform.get_logger(__name__)
+
+
+class GatherPlanSignaller(QtCore.QObject):
+    """
+    Create signaller class for the gather plan worker, required for using signals due to QObject inheritance
+    """
+
+    planned = QtCore.Signal(dict)  # RootPlanner plans and the run's cancel event
+
+
+class GatherPlanWorker(QtCore.QRunnable):
+    def __init__(self, app=None, entities=None):
+        """
+        Prepares the gather off the UI thread. Entity names are prefetched and
+        roots that resolve are planned and handed back right away so their
+        gather workers can be queued. Only then does it wait for a folder sync
+        in progress, create the folders of the entities whose root still does
+        not resolve in bulk and plan those.
+
+        Args:
+            app: sgtk app
+            entities (list): entities about to be gathered
+        """
+        super(GatherPlanWorker, self).__init__()
+
+        self.app = app
+        self.entities = entities or []
+        self.cancelled = None  # threading.Event set when the user cancels
+
+        self.signaller = GatherPlanSignaller()
+        self.planned = self.signaller.planned
+
+    def is_cancelled(self):
+        return bool(self.cancelled and self.cancelled.is_set())
+
+    def emit_plans(self, plans, final):
+        self.planned.emit(
+            {"plans": plans, "final": final, "cancelled": self.cancelled}
+        )
+
+    @QtCore.Slot()
+    def run(self):
+        # one ShotGrid query per entity type for the names workers display
+        ENTITY_NAMES.prefetch(self.app.shotgun, self.entities)
+
+        planner = RootPlanner(app=self.app)
+
+        resolved = []
+        missing = []
+        planned_roots = PathPrefixIndex()
+        for entity in self.entities:
+            root_path = planner.root_path(entity)
+            if root_path:
+                resolved.append(entity)
+                planned_roots.add(root_path, True)
+            else:
+                missing.append(entity)
+
+        # entities nested under the root of another are gathered by its worker
+        self.emit_plans(planner.plan(resolved), final=not missing)
+        if not missing:
+            return
+
+        late = []
+        if not self.is_cancelled():
+            # folders may only be missing because the folder sync is not done
+            FOLDER_SYNC.wait()
+            try:
+                TemplateResolver.prepare_all_folders(self.app, missing)
+            except Exception:
+                # workers report the entities whose root does not resolve
+                logger.error(traceback.format_exc())
+
+            for entity in missing:
+                root_path = planner.root_path(entity)
+                if root_path and planned_roots.lookup(root_path):
+                    # the worker of the outer root is already gathering it
+                    logger.info("{} {} resolved under a root being gathered, its "
+                                "files are listed under that entity".format(
+                                    entity.get("type"), entity.get("id")
+                                ))
+                    continue
+                late.append(entity)
+
+        self.emit_plans(planner.plan(late), final=True)
@@ -0,0 +1,31 @@
+from P4 import OutputHandler
+
+
+class RecordHandler(OutputHandler):
+    def __init__(self, on_record=None, on_message=None, cancelled=None):
+        """
+        P4 output handler handing every tagged record to a callback as soon as
+        perforce streams it, rather than collecting the whole response in memory.
+
+        Args:
+            on_record (callable): called with each tagged record (dict)
+            on_message (callable): called with each message (P4.Message)
+            cancelled (threading.Event): stops the running command once set
+        """
+        OutputHandler.__init__(self)
+        self.on_record = on_record
+        self.on_message = on_message
+        self.cancelled = cancelled
+
+    def outputStat(self, stat):
+        if self.cancelled and self.cancelled.is_set():
+            return OutputHandler.CANCEL
+        if self.on_record:
+            self.on_record(stat)
+        return OutputHandler.HANDLED
+
+    def outputMessage(self, message):
+        if self.on_message:
+            self.on_message(message)
+        # still report so errors and warnings land in p4.errors/p4.warnings
+        return OutputHandler.REPORT
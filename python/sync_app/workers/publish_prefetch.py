@@ -0,0 +1,87 @@
+import traceback
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+logger = sgtk.platform.get_logger(__name__)
+
+# PublishedFile fields shown in the details panel
+PUBLISH_FIELDS = [
+    'code', 'created_at', 'created_by', 'created_by.HumanUser.image', 'description',
+    'entity', 'id', 'image', 'name', 'path', 'project', 'published_file_type',
+    'sg_status_list', 'task', 'task.Task.content', 'task.Task.due_date',
+    'task.Task.sg_status_list', 'task_uniqueness', 'type', 'version',
+    'version.Version.sg_status_list', 'version_number', "task.Task.step.Step.code",
+]
+
+
+class PublishPrefetchSignaller(QtCore.QObject):
+    """
+    Create signaller class for the publish prefetch worker, required for using signals due to QObject inheritance
+    """
+
+    prefetched = QtCore.Signal(dict)  # depot path -> latest publish, per chunk
+    finished = QtCore.Signal(bool)  # True once every chunk was prefetched
+
+
+class PublishPrefetchWorker(QtCore.QRunnable):
+    def __init__(self, app=None, depot_paths=None, chunk_size=200):
+        """
+        Queries the latest PublishedFile of every gathered depot path in the
+        background once gathering is done, with chunked `in` queries, so the
+        details panel can show publishes without a ShotGrid request per click.
+
+        Args:
+            app: sgtk app
+            depot_paths (list): depot paths to look publishes up for
+            chunk_size (int): number of depot paths per query
+        """
+        super(PublishPrefetchWorker, self).__init__()
+
+        self.app = app
+        self.depot_paths = list(dict.fromkeys(depot_paths or []))
+        self.chunk_size = max(1, chunk_size)
+        self.cancelled = None  # threading.Event set when the user cancels
+
+        self.signaller = PublishPrefetchSignaller()
+        self.prefetched = self.signaller.prefetched
+        self.finished = self.signaller.finished
+
+    def chunks(self):
+        for i in range(0, len(self.depot_paths), self.chunk_size):
+            yield self.depot_paths[i:i + self.chunk_size]
+
+    def query(self, depot_paths):
+        """
+        Latest publish of each of the depot paths that has one
+        """
+        order = [{'field_name': 'version_number', 'direction': 'desc'}]
+        publishes = self.app.shotgun.find(
+            'PublishedFile',
+            [["sg_p4_depo_path", "in", depot_paths]],
+            PUBLISH_FIELDS + ["sg_p4_depo_path"],
+            order,
+        )
+        index = {}
+        for publish in publishes:
+            # highest version comes first, keep it
+            index.setdefault(publish.get("sg_p4_depo_path"), publish)
+        return index
+
+    @QtCore.Slot()
+    def run(self):
+        complete = True
+        for chunk in self.chunks():
+            if self.cancelled and self.cancelled.is_set():
+                complete = False
+                break
+            try:
+                index = self.query(chunk)
+            except Exception:
+                # the paths of this chunk are looked up on demand instead
+                logger.error(traceback.format_exc())
+                complete = False
+                continue
+            # paths without a publish are recorded too, so they are not queried again
+            self.prefetched.emit({path: index.get(path, {}) for path in chunk})
+        self.finished.emit(complete)
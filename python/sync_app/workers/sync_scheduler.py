@@ -0,0 +1,43 @@
+import sgtk
+from sgtk.platform.qt import QtCore
+
+logger = sgtk.platform.get_logger(__name__)
+
+
+class SyncScheduler:
+    def __init__(self, max_threads=4):
+        """
+        Runs sync workers on a threadpool of their own, so that thousands of
+        queued file syncs never starve gathering or UI work on the global pool.
+        Workers are started with a priority: selected rows first, then smaller
+        batches before huge ones.
+
+        Args:
+            max_threads (int): number of sync workers allowed to run at once
+        """
+        self.threadpool = QtCore.QThreadPool()
+        self.threadpool.setMaxThreadCount(max(1, max_threads))
+
+    @staticmethod
+    def priority_key(worker):
+        """
+        Sort key of a worker, lowest runs first.
+        """
+        return (not getattr(worker, "selected", False), getattr(worker, "size", 0))
+
+    def schedule(self, workers):
+        """
+        Queue the given workers, highest priority first.
+
+        Args:
+            workers (list): QRunnables optionally exposing `selected` and `size`
+        """
+        ordered = sorted(workers, key=self.priority_key)
+        count = len(ordered)
+        for index, worker in enumerate(ordered):
+            # QThreadPool runs higher priorities first
+            self.threadpool.start(worker, count - index)
+        logger.debug("Scheduled {} sync workers".format(count))
+
+    def active(self):
+        return self.threadpool.activeThreadCount()
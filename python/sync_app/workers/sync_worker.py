@@ -13,10 +13,21 @@ import copy
 
 
 from ..process.template_resolver import TemplateResolver
+from ..process.entity_names import ENTITY_NAMES
+from ..process.folder_sync import FOLDER_SYNC
+from ..utils.connection_pool import checkout
 from ..utils.inspection import method_decorator, trace
+from ..utils.prefix_index import PathPrefixIndex
+from ..utils.gather_cache import GatherCache
 
 logger = sgtk.platform.get_logger(__name__)
 
+# fields requested from the fstat gather pass, all the sync item schema needs
+FSTAT_FIELDS = "depotFile,clientFile,headRev,haveRev,headAction,fileSize,digest"
+
+# head actions of files that no longer exist at head
+FSTAT_DELETE_ACTIONS = ["delete", "move/delete", "purge", "archive"]
+
 
 class SyncSignaller(QtCore.QObject):
     """
@@ -42,6 +53,7 @@ class AssetInfoGatherSignaller(QtCore.QObject):
     gathering_complete = QtCore.Signal(dict)
     total_items_found = QtCore.Signal(dict)
     p4_log_received = QtCore.Signal(dict)  # this is for p4 raw data log
+    shards_found = QtCore.Signal(dict)  # subdirectories to gather in parallel
 
 
 # @method_decorator(trace)
@@ -107,6 +119,284 @@ class SyncWorker(QtCore.QRunnable):
             )
 
 
+# @method_decorator(trace)
+class BatchSyncWorker(QtCore.QRunnable):
+
+    # structurally anticipate basic p4 calls, which will route to the main form.
+    p4 = None
+    fw = None
+    pool = None
+    force = False
+    throttle = None
+    cancelled = None  # threading.Event set when the user cancels the sync
+
+    asset_name = None
+    root_paths = ()  # gather roots of the synced rows, see invalidate_gather_caches
+
+    # scheduling hints, see SyncScheduler
+    selected = False
+    size = 0
+
+    def __init__(self, items=None):
+        """
+        Handles syncing a batch of files from perforce depot to local workspace
+        on disk with a single p4 sync call.
+
+        Args:
+            items (list): dictionaries describing each file of the batch
+                          ...
+                          id: str, the model item id of the row
+                          path: str, the client file to sync
+                          depot_path: str, the depot file of the row
+                          rev: str, the revision planned by the dry run
+                          size: int, the file size in bytes
+        """
+        super(BatchSyncWorker, self).__init__()
+        self.signaller = SyncSignaller()
+
+        self.items = items or []
+
+        # use signals from Signaller, since we cant in a non-QObject derrived
+        # object like this QRunner.
+        self.started = self.signaller.started
+        self.finished = self.signaller.finished
+        self.completed = self.signaller.completed
+
+    def log_error(self, e):
+        self.fw.log_error(str(e))
+        self.fw.log_error(traceback.format_exc())
+
+    @staticmethod
+    def _path_key(path):
+        return os.path.normcase(os.path.normpath(path)) if path else None
+
+    def sync_arguments(self):
+        """
+        Arguments handed to p4 sync, followed by the paths of the batch.
+        Syncs are have-aware unless the user asked to force them.
+        """
+        arguments = []
+        if self.force:
+            arguments.append("-f")
+        return arguments
+
+    def sync_paths(self, items):
+        """
+        Paths of the given items, pinned to the revision found in the dry run
+        so the executed sync matches what the user previewed.
+        """
+        return [
+            "{}#{}".format(item["path"], item.get("rev") or "head")
+            for item in items
+        ]
+
+    def chunks(self):
+        """
+        Split the batch into the chunks handed to perforce one call at a time.
+        Without a bandwidth cap the whole batch goes out in a single call,
+        with one each chunk holds about a burst worth of bytes.
+        """
+        if not self.throttle:
+            return [self.items]
+
+        chunks = []
+        chunk = []
+        chunk_size = 0
+        for item in self.items:
+            size = item.get("size", 0)
+            if chunk and chunk_size + size > self.throttle.burst:
+                chunks.append(chunk)
+                chunk = []
+                chunk_size = 0
+            chunk.append(item)
+            chunk_size += size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def index_items(self):
+        """
+        Build the lookups used to map streamed p4 records back to the model
+        items that requested them.
+        """
+        self._id_map = {}
+        self._pending = {}
+        for item in self.items:
+            self._pending[item["id"]] = item
+            self._id_map[self._path_key(item.get("path"))] = item
+            if item.get("depot_path"):
+                self._id_map[item["depot_path"]] = item
+
+    def item_for_record(self, record):
+        if not isinstance(record, dict):
+            return None
+        item = self._id_map.get(self._path_key(record.get("clientFile")))
+        if not item:
+            item = self._id_map.get(record.get("depotFile"))
+        return item
+
+    def record_synced(self, record):
+        """
+        Called by the output handler as perforce reports each synced file,
+        so rows update while the rest of the batch is still transferring.
+        """
+        item = self.item_for_record(record)
+        if item and self._pending.pop(item["id"], None):
+            self.completed.emit(
+                {"model_item": item["id"], "path": item["path"], "p4_data": [record]}
+            )
+
+    def item_error(self, item, messages):
+        """
+        Find the p4 error message, if any, that refers to the given item
+        """
+        for message in messages:
+            message = str(message)
+            if item.get("path") and item["path"] in message:
+                return message
+            if item.get("depot_path") and item["depot_path"] in message:
+                return message
+
+    def sync_chunk(self, items):
+        """
+        Sync the given items with a single p4 call and report on every one of
+        them. Per-file errors only fail the files perforce names in them, the
+        rest of the chunk still counts as synced or up to date.
+        """
+        from P4 import P4Exception
+        from .p4_output import RecordHandler
+
+        if self.throttle and not self.throttle.consume(
+            sum(item.get("size", 0) for item in items), cancelled=self.cancelled
+        ):
+            # cancelled while waiting for the bandwidth cap, the items are
+            # still pending and reported as cancelled
+            return
+
+        self.p4.handler = RecordHandler(
+            on_record=self.record_synced, cancelled=self.cancelled
+        )
+        chunk_error = None
+        try:
+            # only raise on errors so that per-file warnings (up-to-date etc.)
+            # dont discard the records of the rest of the batch.
+            with self.p4.at_exception_level(1):
+                self.p4.run("sync", *self.sync_arguments(), *self.sync_paths(items))
+        except P4Exception:
+            # raised once the whole command is done, the messages tell which
+            # files failed
+            chunk_error = traceback.format_exc()
+        finally:
+            self.p4.handler = None
+        messages = list(self.p4.errors)
+
+        errors = {}
+        for item in items:
+            error = self.item_error(item, messages)
+            if error:
+                errors[item["id"]] = error
+        if errors:
+            chunk_error = None
+
+        # anything perforce did not report on was already up to date, unless
+        # an error message names it or the command failed as a whole.
+        for item in items:
+            if self._pending.pop(item["id"], None):
+                status_dict = {"model_item": item["id"], "path": item["path"]}
+                if item["id"] in errors:
+                    status_dict["error"] = errors[item["id"]]
+                elif self.is_cancelled():
+                    # perforce was told to stop before it reported on this file
+                    status_dict["cancelled"] = True
+                elif chunk_error:
+                    status_dict["error"] = chunk_error
+                self.completed.emit(status_dict)
+
+    def invalidate_gather_caches(self):
+        """
+        Drop the gather caches of the roots about to be synced, what they
+        recorded as left to sync will not hold once the sync ran.
+        """
+        for root_path in filter(None, self.root_paths):
+            try:
+                GatherCache.remove(self.p4.client, root_path)
+            except Exception as e:
+                logger.warning("Could not invalidate gather cache of {}: {}".format(
+                    root_path, e
+                ))
+
+    def is_cancelled(self):
+        return bool(self.cancelled and self.cancelled.is_set())
+
+    def cancel_pending(self):
+        """
+        Report every item not synced yet as cancelled
+        """
+        for item in list(self._pending.values()):
+            self.completed.emit(
+                {"model_item": item["id"], "path": item["path"], "cancelled": True}
+            )
+        self._pending = {}
+
+    @QtCore.Slot()
+    def run(self):
+
+        """
+        Run a single sync for every path of the batch, signals information
+        back to main thread per item.
+        """
+
+        for item in self.items:
+            self.started.emit({"model_item": item["id"]})
+
+        self.index_items()
+
+        try:
+            with checkout(self.pool, self.fw) as p4:
+                self.p4 = p4
+                self.invalidate_gather_caches()
+                for chunk in self.chunks():
+                    if self.is_cancelled():
+                        break
+                    self.sync_chunk(chunk)
+            self.cancel_pending()
+
+        except Exception as e:
+            if self.is_cancelled():
+                # aborting the command from the output handler may raise
+                self.cancel_pending()
+            error = traceback.format_exc()
+            for item in list(self._pending.values()):
+                self.completed.emit(
+                    {"model_item": item["id"], "path": item["path"], "error": error}
+                )
+            self._pending = {}
+
+        self.finished.emit()
+
+
+# @method_decorator(trace)
+class ParallelSyncWorker(BatchSyncWorker):
+
+    threads = 4
+    batch = 8
+
+    def __init__(self, items=None):
+        """
+        Hands a whole sync session to perforce's own parallel file transfer
+        (p4 sync --parallel) instead of fanning out python runnables. Rows are
+        still updated per file as perforce reports them.
+        """
+        super(ParallelSyncWorker, self).__init__(items=items)
+
+    def sync_arguments(self):
+        arguments = super(ParallelSyncWorker, self).sync_arguments()
+        arguments.append(
+            "--parallel=threads={},batch={}".format(self.threads, self.batch)
+        )
+        return arguments
+
+
 # @method_decorator(trace)
 class AssetInfoGatherWorker(QtCore.QRunnable):
     def __init__(self, app=None, entity=None, framework=None):
@@ -121,15 +411,37 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
         self.entity = entity
 
         self.force_sync = False
-
-        self.asset_map = {}
+        self.force = False
+        self.gather_mode = "fstat"
+        self.up_to_date_precheck = True
+        self.gather_cache_ttl = 0  # hours, 0 disables the gather cache
+        self.shard_threshold = 0  # file count above which roots are split
+        self.shard = False  # gathering a subdirectory of a split root
+        self.root_override = None  # path gathered instead of the entity root
+        self.excluded_extensions = set()  # lower case, files dropped while gathering
+        self.filter_pushdown = False  # also leave them out of the fstat query
+
+        # root path -> {"asset": ..., "entity": ...} owning files under it
+        self.asset_map = PathPrefixIndex()
+        self.owner = None  # asset map value of the worker's own entity
+        self.owners_found = set()  # entities files were found for
+        # {"entity": ..., "root_path": ...} of entities nested under the root
+        self.nested_roots = []
 
         self._items_to_sync = []
+        self._items_count = 0  # items already streamed to the UI
+        self._fstat_count = 0
+        self._cached_records = None  # records to store in the gather cache
+        self._head_change = None  # newest change submitted under the root
+        self._have_change = None  # newest change of the root in the workspace
         self._status = None
         self._icon = None
         self._detail = None
 
         self.fw = framework
+        self.pool = None
+        self.p4 = None
+        self.cancelled = None  # threading.Event set when the user cancels
         self.asset_item = None  # this is expected to be a dictionary
 
         self.progress_batch_size = 0
@@ -148,6 +460,7 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
         self.gathering_complete = self.signaller.gathering_complete
 
         self.p4_log_received = self.signaller.p4_log_received  # raw p4 log
+        self.shards_found = self.signaller.shards_found
 
         self.have_rev_dict = {}
 
@@ -157,33 +470,34 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
         self.fw.log_error(str(e))
         self.fw.log_error(traceback.format_exc())
 
+    def is_cancelled(self):
+        return bool(self.cancelled and self.cancelled.is_set())
+
     @property
     def asset_name(self):
+        return self.entity_name(self.asset_item, self.entity)
 
+    def entity_name(self, asset_item, entity):
+        """
+        Name of the asset row files of the given entity are shown under
+        """
         name = None
-        if self.asset_item.get("context"):
-            name = self.asset_item.get("context").entity.get("name")
+        if asset_item.get("context"):
+            name = asset_item.get("context").entity.get("name")
         if not name:
-            if self.entity.get("code"):
-                name = self.entity.get("code")
-            else:
-                name = self.app.shotgun.find_one(
-                    self.entity.get("type"),
-                    [["id", "is", self.entity.get("id")]],
-                    ["code"],
-                ).get("code")
-
-        if self.entity.get("type") in ["PublishFiles"]:
-            sg_ret = self.app.shotgun.find_one(
-                "Asset",
-                [["id", "is", self.entity.get("entity").get("id")]],
-                ["code"],
+            name = ENTITY_NAMES.name(self.app.shotgun, entity)
+
+        if entity.get("type") in ["PublishFiles"]:
+            name = ENTITY_NAMES.name(
+                self.app.shotgun,
+                {"type": "Asset", "id": entity.get("entity").get("id")},
             )
-            name = sg_ret.get("code")
         return name
 
     @property
     def root_path(self):
+        if self.root_override:
+            return self.root_override
         rp = self.asset_item.get("root_path")
         if self.entity.get("type") in ["PublishedFile"]:
             rp = (self.entity.get("path")).get("local_path")
@@ -197,12 +511,86 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
             self._detail = self.asset_item.get("error")
         return self._status
 
+    @staticmethod
+    def newest_change(p4, path):
+        """
+        Number of the newest submitted changelist affecting the given path,
+        0 if there is none.
+        """
+        with p4.at_exception_level(1):
+            changes = p4.run("changes", "-m1", "-s", "submitted", path)
+        changes = [i for i in changes if isinstance(i, dict)]
+        return int(changes[0].get("change", 0)) if changes else 0
+
+    @staticmethod
+    def file_count(p4, path):
+        """
+        Number of files p4 sizes finds under the given path, 0 if there are
+        none.
+        """
+        with p4.at_exception_level(1):
+            sizes = p4.run("sizes", "-s", path)
+        sizes = [i for i in sizes if isinstance(i, dict)]
+        return int(sizes[0].get("fileCount", 0)) if sizes else 0
+
+    def is_up_to_date(self):
+        """
+        Cheap pre-check comparing the newest changelist submitted under the
+        root with the newest changelist the workspace has of it, and how many
+        files the workspace has of the root with how many there are at head.
+        A partial sync brings the newest changelist in while leaving other
+        files out, so both have to match for the root to be flagged as Syncd
+        without scanning its files. Skipped when forcing, since every file is
+        synced again anyway.
+        """
+        if not self.up_to_date_precheck or self.force or not self.root_path:
+            return False
+
+        try:
+            with checkout(self.pool, self.fw) as p4:
+                self.p4 = p4
+                head_change = self.newest_change(p4, self.root_path)
+                have_change = self.newest_change(p4, self.root_path + "#have")
+                if head_change and head_change == have_change:
+                    head_files = self.file_count(p4, self.root_path)
+                    have_files = self.file_count(p4, self.root_path + "#have")
+                else:
+                    head_files = have_files = None
+        except Exception as e:
+            # fall back to the full scan, which reports errors properly
+            logger.warning("Up to date pre-check failed for {}: {}".format(
+                self.root_path, e
+            ))
+            return False
+
+        # remembered for the gather cache, which is stamped with them
+        self._head_change = head_change
+        self._have_change = have_change
+
+        if not head_change or head_change != have_change:
+            return False
+        if head_files != have_files:
+            logger.info("{} of {} files of {} in the workspace, scanning it".format(
+                have_files, head_files, self.root_path
+            ))
+            return False
+
+        self._status = "Syncd"
+        self._icon = "success"
+        self._detail = "Up to date at change {} for [{}]".format(
+            head_change, self.root_path
+        )
+        logger.info(self._detail)
+        return True
+
     def collect_and_map_info(self):
         """
         Call perforce for response and form data we will signal back
         """
 
         if self.status != "Error":
+            if self.is_up_to_date():
+                return
             self.get_perforce_sync_dry_reponse()
 
         # payload that we'll send back to the main thread to make UI item with
@@ -229,16 +617,29 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
         """
         logger.debug("DRY RESPONSE RAN!")
 
-        if self.root_path: 
+        if self.root_path and self.gather_mode == "fstat":
+            self.get_perforce_fstat_response()
+        else:
+            self.get_perforce_sync_preview_response()
 
-            self.p4 = self.fw.connection.connect()
+    def get_perforce_sync_preview_response(self):
+        """
+        Gather with a p4 sync -n preview of the root, followed by an fstat of
+        the same tree for the have revisions.
+        """
+        if self.root_path: 
 
             arguments = ["-n"]
             if self.force:
                 arguments.append("-f")
-            sync_response = self.p4.run("sync", *arguments, self.root_path + "#head")
 
-            fstat_list = self.p4.run("fstat", self.root_path)
+            with checkout(self.pool, self.fw) as p4:
+                self.p4 = p4
+                sync_response = self.p4.run("sync", *arguments, self.root_path + "#head")
+
+                fstat_list = []
+                if not self.is_cancelled():
+                    fstat_list = self.p4.run("fstat", self.root_path)
             for fstat in fstat_list:
                 key = fstat.get('clientFile', None)
                 val = fstat.get('haveRev', "0")
@@ -263,7 +664,10 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
                 self._detail = "Nothing new to sync for [{}]".format(self.root_path)
             else:
                 # if the response from p4 has items... make UI elements for them
-                self._items_to_sync = [i for i in sync_response if type(i) != str]
+                self._items_to_sync = [
+                    i for i in sync_response
+                    if type(i) != str and not self.is_excluded(i)
+                ]
                 # self._items_to_sync = [i for i in sync_response]
                 self._status = "{} items to Sync".format(len(self._items_to_sync))
                 self._icon = "load"
@@ -275,6 +679,381 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
             self._icon = "error"
             self._detail = f"Asset has no or multiple root paths."
 
+    @staticmethod
+    def sync_record_from_fstat(fstat, force=False):
+        """
+        Derive the record p4 sync -n would report for a file from its fstat,
+        or None if the file does not need syncing.
+        """
+        head_rev = fstat.get("headRev")
+        have_rev = fstat.get("haveRev")
+
+        # opened for add but never submitted, there is nothing in the depot
+        # to sync
+        if not head_rev:
+            return None
+
+        if fstat.get("headAction") in FSTAT_DELETE_ACTIONS:
+            if not have_rev:
+                return None
+            action = "deleted"
+        elif not have_rev:
+            action = "added"
+        elif have_rev != head_rev:
+            action = "updated"
+        elif force:
+            action = "refreshed"
+        else:
+            return None
+
+        return {
+            "depotFile": fstat.get("depotFile"),
+            "clientFile": fstat.get("clientFile"),
+            "rev": head_rev,
+            "action": action,
+            "fileSize": fstat.get("fileSize"),
+            "digest": fstat.get("digest"),
+            "haveRev": have_rev or "0",
+        }
+
+    def fstat_streamed(self, fstat):
+        """
+        Called by the output handler for every fstat record as perforce streams
+        it. Files that need syncing go downstream right away rather than once
+        the whole response is in, so rows show up early on huge roots.
+        """
+        self._fstat_count += 1
+        record = self.sync_record_from_fstat(fstat, force=self.force)
+        if record:
+            if self._cached_records is not None:
+                self._cached_records[record["depotFile"]] = record
+            if self.is_excluded(record):
+                return
+            self.p4_log_received.emit(record)
+            self.emit_item(self._items_count, record, 0)
+            self._items_count += 1
+
+    def fstat_revalidated(self, fstat):
+        """
+        Called for every file touched by changelists newer than the gather
+        cache, replacing what the cache knew about it.
+        """
+        record = self.sync_record_from_fstat(fstat, force=self.force)
+        if record:
+            self._cached_records[record["depotFile"]] = record
+        else:
+            self._cached_records.pop(fstat.get("depotFile"), None)
+
+    def run_fstat(self, p4, path, on_record):
+        """
+        Restricted fstat of the given path, handing every record to
+        `on_record` as perforce streams it.
+        """
+        from .p4_output import RecordHandler
+
+        arguments = ["-Rc", "-Ol", "-T", FSTAT_FIELDS]
+        if self.filter_expression:
+            arguments.extend(["-F", self.filter_expression])
+
+        p4.handler = RecordHandler(on_record=on_record, cancelled=self.cancelled)
+        try:
+            # only raise on errors, "no such file(s)" is an answer here
+            with p4.at_exception_level(1):
+                p4.run("fstat", *arguments, path)
+        finally:
+            p4.handler = None
+
+    @property
+    def root_base(self):
+        """
+        Root path without its trailing recursive wildcard
+        """
+        return self.root_path[:-3].rstrip("/\\")
+
+    def shard_roots(self, p4):
+        """
+        Subdirectories of the root to gather in parallel by separate workers,
+        when the root holds more files than the shard threshold. Empty if the
+        root is small enough to be gathered in one pass.
+        """
+        if self.shard or not self.shard_threshold or self.shard_threshold <= 0:
+            return []
+        if not self.root_path or not self.root_path.endswith("..."):
+            return []
+
+        file_count = self.file_count(p4, self.root_path)
+        if file_count <= self.shard_threshold:
+            return []
+
+        with p4.at_exception_level(1):
+            dirs = p4.run("dirs", self.root_base + "/*")
+        shards = [
+            "{}/...".format(i["dir"]) for i in dirs if isinstance(i, dict) and i.get("dir")
+        ]
+        logger.info("Splitting {} ({} files) into {} shards".format(
+            self.root_path, file_count, len(shards)
+        ))
+        return shards
+
+    def partition_nested(self, shards):
+        """
+        Hand every nested entity to the shard its root lies in, so the worker
+        of that shard reports it. Shards are depot directories while nested
+        roots are local paths, they are matched on the subdirectory of the root
+        they sit in.
+
+        Returns:
+            tuple: list of {"root_path": ..., "nested": [...]} per shard, and
+                   the nested entities no shard covers
+        """
+        base = PathPrefixIndex.split(self.root_base)
+        by_dir = {}
+        for shard in shards:
+            parts = PathPrefixIndex.split(shard)
+            by_dir[parts[-1] if parts else None] = {"root_path": shard, "nested": []}
+
+        uncovered = []
+        for nested in self.nested_roots:
+            parts = PathPrefixIndex.split(nested["root_path"])
+            shard = None
+            if len(parts) > len(base) and parts[:len(base)] == base:
+                shard = by_dir.get(parts[len(base)])
+            if shard:
+                shard["nested"].append(nested)
+            else:
+                uncovered.append(nested)
+        return list(by_dir.values()), uncovered
+
+    def is_excluded(self, record):
+        """
+        Whether the user filtered out the extension of the record's file, in
+        which case it is dropped rather than shown and hidden.
+        """
+        if not self.excluded_extensions:
+            return False
+        name = os.path.basename(record.get("clientFile") or record.get("depotFile") or "")
+        if "." not in name:
+            return False
+        return name.split(".")[-1].lower() in self.excluded_extensions
+
+    @property
+    def filter_expression(self):
+        """
+        fstat -F expression leaving out the excluded extensions on the server,
+        None unless pushing filters down to perforce is enabled.
+        """
+        if not self.filter_pushdown or not self.excluded_extensions:
+            return None
+        return " ".join(
+            "^depotFile=*.{}".format(ext) for ext in sorted(self.excluded_extensions)
+        )
+
+    def gather_cache(self, p4):
+        """
+        Gather cache of this root for the connection's workspace, or None when
+        caching is disabled, the gather is forced or files are filtered out on
+        the server, which would leave them out of the cache too.
+        """
+        if self.force or not self.gather_cache_ttl or self.gather_cache_ttl <= 0:
+            return None
+        if self.filter_expression:
+            return None
+        try:
+            return GatherCache(
+                p4.client, self.root_path, ttl_hours=self.gather_cache_ttl
+            )
+        except Exception as e:
+            logger.warning("Gather cache unavailable for {}: {}".format(
+                self.root_path, e
+            ))
+            return None
+
+    def get_perforce_fstat_response(self):
+        """
+        Gather head revision, have revision, action, size and digest of every
+        file mapped under the root in one restricted fstat pass, and derive
+        what there is to sync locally while the records stream in.
+
+        When a gather cache of the root is still valid, only the files touched
+        by changelists submitted since it was stamped are looked at.
+        """
+        self._fstat_count = 0
+        self._items_count = 0
+        self._cached_records = None
+
+        self.total_items_found.emit({"id": -1, "count": 0})
+
+        with checkout(self.pool, self.fw) as p4:
+            self.p4 = p4
+
+            cache = self.gather_cache(p4)
+            if cache is not None:
+                if self._head_change is None:
+                    self._head_change = self.newest_change(p4, self.root_path)
+                    self._have_change = self.newest_change(
+                        p4, self.root_path + "#have"
+                    )
+                self._cached_records = {}
+
+            if cache is not None and cache.valid(self._have_change):
+                self._cached_records = dict(cache.records)
+                self._fstat_count = cache.files
+                if self._head_change > cache.head_change:
+                    self.run_fstat(
+                        p4,
+                        "{}@{},@{}".format(
+                            self.root_path, cache.head_change + 1, self._head_change
+                        ),
+                        self.fstat_revalidated,
+                    )
+                for record in self._cached_records.values():
+                    if self.is_cancelled():
+                        break
+                    if self.is_excluded(record):
+                        continue
+                    self.p4_log_received.emit(record)
+                    self.emit_item(self._items_count, record, 0)
+                    self._items_count += 1
+                logger.info("Gather cache of {} revalidated from change {} to {}".format(
+                    self.root_path, cache.head_change, self._head_change
+                ))
+            else:
+                shards = self.shard_roots(p4)
+                if shards:
+                    # subdirectories are gathered by their own workers, this
+                    # one only keeps the files sitting at the top of the root
+                    cache = None
+                    self._cached_records = None
+                    shards, self.nested_roots = self.partition_nested(shards)
+                    self.shards_found.emit(
+                        {
+                            "worker_id": self.id,
+                            "entity": self.entity,
+                            "asset_item": self.asset_item,
+                            "shards": shards,
+                            "cancelled": self.cancelled,
+                        }
+                    )
+                    self.root_override = self.root_base + "/*"
+                self.run_fstat(p4, self.root_path, self.fstat_streamed)
+
+            # an interrupted gather is not worth remembering
+            if cache is not None and not self.is_cancelled():
+                cache.store(
+                    self._head_change,
+                    self._have_change,
+                    self._cached_records,
+                    self._fstat_count,
+                )
+            self._cached_records = None
+
+        if not self._fstat_count:
+            self._status = "Not In Depot"
+            self._icon = "error"
+            self._detail = "Nothing in depot resolves [{}]".format(self.root_path)
+        elif not self._items_count:
+            self._status = "Syncd"
+            self._icon = "success"
+            self._detail = "Nothing new to sync for [{}]".format(self.root_path)
+        else:
+            self._status = "{} items to Sync".format(self._items_count)
+            self._icon = "load"
+            self._detail = self.root_path
+
+        logger.info(">>>>>> Unpublished: streamed items to sync count: {} ".format(self._items_count))
+
+    @staticmethod
+    def asset_map_key(entity):
+        return (entity.get("type"), entity.get("id"))
+
+    def map_roots(self):
+        """
+        Register the worker's own root and the roots of the entities nested
+        under it, planned by the RootPlanner, in the asset map.
+        """
+        self.owner = {"asset": self.asset_item, "entity": self.entity}
+        if self.asset_item.get("error"):
+            return
+        if self.root_path and not self.shard:
+            self.asset_map.add(self.root_path, self.owner)
+        for nested in self.nested_roots:
+            self.asset_map.add(
+                nested["root_path"],
+                {
+                    "asset": {
+                        "entity": nested["entity"],
+                        "root_path": nested["root_path"],
+                    },
+                    "entity": nested["entity"],
+                },
+            )
+
+    def emit_nested_syncd(self):
+        """
+        Report the nested entities nothing was found to sync for, they would
+        not get an asset row otherwise.
+        """
+        for nested in self.nested_roots:
+            entity = nested["entity"]
+            if self.asset_map_key(entity) in self.owners_found:
+                continue
+            self.item_found_to_sync.emit(
+                {
+                    "worker_id": self.id,
+                    "asset_name": self.entity_name({}, entity),
+                    "status": "Everything sync'd",
+                    "detail": nested["root_path"]
+                }
+            )
+
+    def emit_item(self, j, item, items_count):
+        """
+        Signal a single item found to sync back to the main thread.
+
+        Args:
+            j (int): index of the item within this worker's findings
+            item (dict): sync record of the file
+            items_count (int): number of items found, 0 while still streaming
+        """
+        if j % 50 == 0 or j == items_count-1:
+            self.total_items_found.emit(
+                {"id": j, "count": items_count}
+            )
+
+        # the deepest root containing the file owns it, nested entities included
+        owner = self.asset_map.lookup(item.get("clientFile"), self.owner)
+        asset_item = owner["asset"]
+        entity = owner["entity"]
+        self.owners_found.add(self.asset_map_key(entity))
+
+        ext = None
+
+        if "." in item.get("clientFile"):
+            ext = os.path.basename(item.get("clientFile")).split(".")[
+                -1
+            ].lower()
+            self.includes.emit(("ext", ext))
+
+        # Store haveRev data in item
+        client_file = item.get("clientFile", None)
+        if client_file and "haveRev" not in item:
+            item["haveRev"] = self.have_rev_dict.get(client_file, "0")
+
+        status = item.get("action")
+        if entity.get("type") in ["PublishedFile"]:
+            status = "Exact File"
+        self.item_found_to_sync.emit(
+            {
+                "worker_id": self.id,
+                "asset_name": self.entity_name(asset_item, entity),
+                "item_found": item,
+                "ext": ext,
+                "status": status,
+                "index": j,
+                "detail": self.root_path
+            }
+        )
+
     @QtCore.Slot()
     def run(self):
 
@@ -282,13 +1061,25 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
         Checks if there are errors in the item, signals that, or if not, gets info regarding what there is to sync.
         """
 
-        try:
+        if self.is_cancelled():
+            self.info_gathered.emit({"status": "cancelled"})
+            return
 
-            self.template_resolver = TemplateResolver(
-                app=self.app, entity=self.entity, p4=self.p4
-            )
+        started = time.time()
+        try:
 
-            self.asset_item = self.template_resolver.entity_info
+            if not self.asset_item:
+                resolved_at = time.time()
+                self.template_resolver = TemplateResolver(
+                    app=self.app, entity=self.entity, p4=self.p4
+                )
+                self.asset_item = self.template_resolver.entity_info
+                # folders may not be synced yet, only then is it worth waiting
+                if self.asset_item.get("error") and FOLDER_SYNC.ensure(
+                    self.app, resolved_at
+                ):
+                    self.asset_item = self.template_resolver.entity_info
+            self.map_roots()
             progress_status_string = ""
 
             self.status_update.emit(
@@ -312,43 +1103,17 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
                     )
 
                     for j, item in enumerate(self._items_to_sync):
-                        if j % 50 == 0 or j == items_count-1:
-                            self.total_items_found.emit(
-                                {"id": j, "count": items_count}
-                            )
-
-                        for i in self.asset_map.keys():
-                            if i in item.get("clientFile"):
-                                self.asset_item = self.asset_map[i]["asset"]
-                                self.entity = self.asset_map[i]["entity"]
-
-                        ext = None
-
-                        if "." in item.get("clientFile"):
-                            ext = os.path.basename(item.get("clientFile")).split(".")[
-                                -1
-                            ]
-                            self.includes.emit(("ext", ext.lower()))
-
-                        # Store haveRev data in item
-                        client_file = item.get("clientFile", None)
-                        if client_file:
-                            item["haveRev"] = self.have_rev_dict.get(client_file, "0")
-
-                        status = item.get("action")
-                        if self.entity.get("type") in ["PublishedFile"]:
-                            status = "Exact File"
-                        self.item_found_to_sync.emit(
-                            {
-                                "worker_id": self.id,
-                                "asset_name": self.asset_name,
-                                "item_found": item,
-                                "ext": ext.lower(),
-                                "status": status,
-                                "index": j,
-                                "detail": self.root_path
-                            }
-                        )
+                        if self.is_cancelled():
+                            break
+                        self.emit_item(j, item, items_count)
+                elif self._items_count:
+                    # items were streamed to the UI while perforce answered
+                    self.total_items_found.emit(
+                        {"id": self._items_count - 1, "count": self._items_count}
+                    )
+                elif self.shard:
+                    # the worker of the whole root reports the asset itself
+                    pass
                 else:
                     self.item_found_to_sync.emit(
                         {
@@ -358,6 +1123,9 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
                             "detail": self.root_path
                         }
                     )
+                # shards report the nested entities they were handed, a split
+                # root keeps only the ones no shard covers
+                self.emit_nested_syncd()
             else:
                 progress_status_string = " (Encountered error. See details)"
                 self.item_found_to_sync.emit(
@@ -376,4 +1144,11 @@ class AssetInfoGatherWorker(QtCore.QRunnable):
 
             self.log_error(traceback.format_exc())
 
-        self.info_gathered.emit({"status": "gathered"})
+        self.info_gathered.emit(
+            {
+                "status": "cancelled" if self.is_cancelled() else "gathered",
+                "entity": self.entity,
+                "duration": time.time() - started,
+                "files": self._fstat_count,
+            }
+        )
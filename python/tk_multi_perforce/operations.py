@@ -120,55 +120,48 @@ def open_sync_files_dialog(app, entity_type=None,  entity_ids=None):
    
 
 def entities_from_tasks(app, tasks):
+    """
+    Expand tasks into the entities to sync: the linked entities of the tasks,
+    plus the top level assets related to them. Relations are queried in bulk,
+    one query per entity type, whatever the number of tasks.
+    """
     entities_to_sync = []
-    uids = []
-    if tasks:
-        for task in tasks:
-            linked_entity = task.get('entity')
-            if linked_entity:
-                uid = "{}_{}".format(linked_entity.get('type'), linked_entity.get('id'))
-
-                if linked_entity.get('type') in ["Asset", "Sequence", "Shot", "CustomEntity01"]:
-                    ids = []
-                    assets = []
-                    env_asset = None
-                    # Since we'll be iterating through possible asset relations below, keep a uid of type/id 
-                    # so we can ensure we have item novelty
-                    if uid not in uids:
-                            uids.append(uid)
-
-                    # assuming coverage for the above list of types is provided in the resolver, add the linked_entity
-                    entities_to_sync.append(linked_entity)      
-
-                    # Asset
-                    if (linked_entity.get('type') == "Asset"):
-                        assets = app.shotgun.find(linked_entity.get('type'), [['id', 'in', [linked_entity.get('id')]]], ['sg_asset_parent'])
-
-                    # Shot
-                    elif (linked_entity.get('type') == "Shot"):
-                        shot = app.shotgun.find_one("Shot", [['id', 'in', [linked_entity.get('id')]]], ['sg_sequence.Sequence.assets']) 
-                        if shot.get('sg_sequence.Sequence.assets'):
-                            asset_ids = [i.get('id') for i in shot.get('sg_sequence.Sequence.assets')]
-                            assets = app.shotgun.find("Asset", [['id', 'in', asset_ids]], ['sg_asset_parent'])
-
-                    # Sequence
-                    elif (linked_entity.get('type') == "Sequence"):
-                        seq = app.shotgun.find_one("Sequence", [['id', 'in', [linked_entity.get('id')]]], ['assets']) 
-                        if seq.get('assets'):
-                            assets = app.shotgun.find("Asset", [['id', 'in', [i.get('id') for i in seq.get('assets')]]], ['sg_asset_parent'])
-
-                    # identify the parent asset if one exists
-                    ids.extend([i.get('sg_asset_parent').get('id') for i in assets if i.get('sg_asset_parent')])
-                    ids.extend([i.get('id') for i in assets if not i.get('sg_asset_parent')])   
-
-                    # add all assets discovered if uid key not already in the dict. 
-                    for id in list(set(ids)): 
-                        uid = "{}_{}".format("Asset", id)
-                        if uid not in uids:
-                            uids.append(uid)                        
-                            entities_to_sync.append({"type": "Asset", "id": id})      
-
+    uids = set()
+
+    def add(entity):
+        uid = (entity.get('type'), entity.get('id'))
+        if uid not in uids:
+            uids.add(uid)
+            entities_to_sync.append(entity)
+
+    ids_by_type = {"Asset": [], "Sequence": [], "Shot": []}
+    for task in tasks or []:
+        linked_entity = task.get('entity')
+        if linked_entity and linked_entity.get('type') in ["Asset", "Sequence", "Shot", "CustomEntity01"]:
+            # assuming coverage for the above list of types is provided in the resolver, add the linked_entity
+            add(linked_entity)
+            if linked_entity.get('type') in ids_by_type:
+                ids_by_type[linked_entity.get('type')].append(linked_entity.get('id'))
+
+    asset_ids = list(ids_by_type["Asset"])
+
+    # Shot
+    if ids_by_type["Shot"]:
+        shots = app.shotgun.find("Shot", [['id', 'in', ids_by_type["Shot"]]], ['sg_sequence.Sequence.assets'])
+        for shot in shots:
+            asset_ids.extend([i.get('id') for i in shot.get('sg_sequence.Sequence.assets') or []])
+
+    # Sequence
+    if ids_by_type["Sequence"]:
+        seqs = app.shotgun.find("Sequence", [['id', 'in', ids_by_type["Sequence"]]], ['assets'])
+        for seq in seqs:
+            asset_ids.extend([i.get('id') for i in seq.get('assets') or []])
+
+    # identify the parent asset if one exists
+    if asset_ids:
+        assets = app.shotgun.find("Asset", [['id', 'in', list(dict.fromkeys(asset_ids))]], ['sg_asset_parent'])
+        for asset in assets:
+            parent = asset.get('sg_asset_parent')
+            add({"type": "Asset", "id": parent.get('id') if parent else asset.get('id')})
 
     return entities_to_sync
-
-   
\ No newline at end of file